@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — datos sintéticos y medición de rendimiento
+-----------------------------------------------------------------------
+Genera inventarios y actas con la misma estructura que los reales (hojas de
+equipos, FUERA DE SERVICIO, Hoja CC y SIN SERIAL; actas con fecha en fila 8,
+tabla de ítems, marcador OBSERVACIONES Y RECOMENDACIONES y tabla de ASISTENTES)
+y mide por separado cada etapa del proceso: lectura del acta, carga del
+inventario, mapa CC, índice por serie, aplicación de cambios y guardado.
+
+Uso:
+  python actualizador_inventario_bench.py                       # 10k, 100k y 500k filas
+  python actualizador_inventario_bench.py --sizes 10000 --items 500 --json bench.json
+  python actualizador_inventario_bench.py --generate CARPETA --sizes 20000   # solo generar archivos
+  python actualizador_inventario_bench.py --startup             # arranque de la ventana vs. objetivo
+
+Los tiempos salen de una corrida sin instrumentar; el pico de memoria por etapa,
+de una segunda corrida con tracemalloc (memoria asignada desde Python, incluye
+pandas/NumPy), que por sí mismo hace varias veces más lento el proceso.
+--no-memory omite esa segunda corrida. Aparte del total se informa "instantanea":
+la carga de todas las hojas desde la instantánea columnar (corridas siguientes).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from openpyxl import Workbook
+
+from actualizador_inventario_core import (
+    DEFAULT_START_ROW,
+    DEFAULT_LOCATION_MODE,
+    DEFAULT_ACTA_MODE,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_FUZZY_MODE,
+    ActaDocument,
+    InventorySession,
+    apply_acta,
+    save_inventory,
+)
+
+
+DEFAULT_SIZES = (10_000, 100_000, 500_000)
+DEFAULT_ITEMS = 200
+
+# Arranque de la GUI: segundos desde que se lanza Python hasta la ventana lista, sin
+# cargar estas bibliotecas (el núcleo se importa después, en segundo plano)
+DEFAULT_STARTUP_TARGET = 1.0
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+
+# Reparto de filas entre hojas del inventario
+SHEET_SHARES = (("EQUIPOS", 0.6), ("MOBILIARIO", 0.25), ("FUERA DE SERVICIO", 0.15))
+
+INVENTORY_HEADER = [
+    "No",
+    "DESCRIPCIÓN DEL ACTIVO Ó BIEN",
+    "NUMERO DE SERIE",
+    "NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)",
+    "VALOR DE ADQUISICIÓN",
+    "RESPONSABLE",
+    "UBICACIÓN",
+    "NO ACTA",
+    "FECHA ULTIMA ASIGNACION",
+    "OBSERVACIONES UNIDAD",
+]
+FUERA_HEADER = [
+    "ITEM",
+    "DESCRIPCIÓN DEL ACTIVO Ó BIEN",
+    "NUMERO DE SERIE ELEMENTO",
+    "RESPONSABLE",
+    "UBICACIÓN",
+    "NUMERO DE ACTA",
+    "OBSERVACIONES UNIDAD",
+]
+SIN_SERIAL_HEADER = [
+    "No",
+    "DESCRIPCIÓN DEL ACTIVO Ó BIEN",
+    "DESCRIPCIÓN ADICIONAL - ACCESORIOS",
+    "NÚMERO DE SERIE DEL BIEN / O LOTE PARA EL CASO DE MUNICIÓN",
+    "NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)",
+    "VALOR DE ADQUISICIÓN",
+    "CANTIDAD",
+    "OBSERVACIONES UNIDAD",
+    "OBSERVACION INTERNA",
+    "UBICACIÓN",
+    "No ACTA",
+    "FECHA",
+    "RESPONSABLE",
+]
+ACTA_ITEMS_HEADER = [
+    "No",
+    "DESCRIPCIÓN DEL ACTIVO Ó BIEN",
+    "DESCRIPCIÓN ADICIONAL - ACCESORIOS",
+    "NÚMERO DE SERIE DEL BIEN",
+    "NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)",
+    "VALOR DE ADQUISICIÓN",
+    "CANTIDAD",
+    "OBSERVACIONES",
+]
+GRADOS = ("PT", "SI", "IT", "SC", "AG", "")
+UBICACIONES = ("CENTRO NORTE", "SUR", "OCCIDENTE", "ORIENTE", "BODEGA")
+
+
+# -------- Generador --------
+def _cedula(i):
+    return 10_000_000 + i
+
+
+def generate_inventory(path, n_rows, people=300, seed=0):
+    """Escribe un inventario sintético de ``n_rows`` filas repartidas en varias hojas.
+
+    Devuelve la lista de series (tal como quedaron en el libro) para armar actas.
+    Se escribe en modo write-only, así que 500k filas no llenan la memoria.
+    """
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    serials = []
+    n = 0
+    for name, share in SHEET_SHARES:
+        ws = wb.create_sheet(title=name)
+        count = int(n_rows * share) if name != SHEET_SHARES[-1][0] else n_rows - n
+        fuera = "FUERA" in name
+        ws.append(FUERA_HEADER if fuera else INVENTORY_HEADER)
+        for i in range(count):
+            n += 1
+            serial = "N/A" if rnd.random() < 0.02 else f"{name[:2]}{n:07d}"
+            if serial != "N/A":
+                serials.append(serial)
+            desc = f"ELEMENTO {rnd.randint(1, 5000)}"
+            resp = f"PT. PERSONA {rnd.randrange(people)}"
+            obs = "N/A" if rnd.random() < 0.15 else ""
+            if fuera:
+                ws.append([i + 1, desc, serial, resp, rnd.choice(UBICACIONES), "", obs])
+            else:
+                ws.append([i + 1, desc, serial, f"INV{n:08d}", str(rnd.choice((150000, 1500000, 3200000))),
+                           resp, rnd.choice(UBICACIONES), "", "", obs])
+
+    ws = wb.create_sheet(title="Hoja CC")
+    ws.append(["GRADO", "NOMBRES Y APELLIDOS", "CC"])
+    for i in range(people):
+        ws.append([GRADOS[i % len(GRADOS)], f"PERSONA {i}", f"{_cedula(i):,}".replace(",", ".")])
+
+    ws = wb.create_sheet(title="SIN SERIAL")
+    ws.append(SIN_SERIAL_HEADER)
+    for i in range(max(1, n_rows // 1000)):
+        ws.append([i + 1, f"ELEMENTO SIN SERIE {i}", "N/A", "N/A", f"INVSS{i:06d}", "150000", "1",
+                   "", "Auto-registro (SIN SERIE)", "BODEGA", "ACTA No. 1", "2024-01-15", "SIN RESPONSABLE"])
+
+    wb.save(path)
+    return serials
+
+
+def _typo(serial, rnd):
+    # Errores de digitación típicos: O por 0, guion de más, dos caracteres invertidos
+    kind = rnd.randrange(3)
+    if kind == 0 and "0" in serial:
+        return serial.replace("0", "O", 1)
+    i = rnd.randrange(1, len(serial) - 1)
+    if kind == 1:
+        return f"{serial[:i]}-{serial[i:]}"
+    return serial[:i] + serial[i + 1] + serial[i] + serial[i + 2:]
+
+
+def generate_acta(path, serials, items=DEFAULT_ITEMS, acta_no=240, when=None, cc=None,
+                  miss_rate=0.1, typo_rate=0.03, seed=0):
+    """Escribe un acta con ``items`` ítems tomados de ``serials``.
+
+    Aproximadamente ``miss_rate`` de los ítems no están en el inventario o vienen
+    sin serie (terminan en SIN SERIAL) y ``typo_rate`` traen la serie mal digitada;
+    algunos traen espacios o minúsculas.
+    """
+    rnd = random.Random(seed)
+    when = when or date(2025, 11, 14)
+    cc = cc if cc is not None else _cedula(3)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "ACTA"
+
+    ws.cell(2, 2, "INFORMACIÓN PÚBLICA")
+    ws.cell(4, 3, f"ACTA No. {acta_no}")
+    ws.cell(6, 2, "ACTA DE ASIGNACIÓN DE BIENES")
+    # Fila 8: cajas DD / MM / AA
+    ws.cell(8, 1, "DD"); ws.cell(8, 2, when.day)
+    ws.cell(8, 4, "MM"); ws.cell(8, 5, when.month)
+    ws.cell(8, 7, "AA"); ws.cell(8, 8, when.year % 100)
+    ws.cell(14, 1, "LUGAR:")
+    ws.cell(14, 2, f"DIPOL - GRISE - {rnd.choice(UBICACIONES)} OBJETIVO: asignación de elementos")
+
+    for c, h in enumerate(ACTA_ITEMS_HEADER, start=1):
+        ws.cell(DEFAULT_START_ROW, c, h)
+    r = DEFAULT_START_ROW + 1
+    for j in range(items):
+        roll = rnd.random()
+        if roll < miss_rate / 2:
+            serial = ""
+        elif roll < miss_rate:
+            serial = f"ZZ{rnd.randrange(10**7):07d}"
+        else:
+            serial = rnd.choice(serials)
+            if rnd.random() < typo_rate:
+                serial = _typo(serial, rnd)
+            elif rnd.random() < 0.05:
+                serial = f" {serial.lower()} "
+        row = [j + 1, f"ELEMENTO {j}", "N/A", serial, f"INV{j:06d}", 1500000.0, 1,
+               "BUEN ESTADO" if rnd.random() < 0.7 else "N/A"]
+        for c, v in enumerate(row, start=1):
+            ws.cell(r, c, v)
+        r += 1
+    ws.cell(r + 1, 1, "OBSERVACIONES Y RECOMENDACIONES")
+
+    h = r + 5
+    ws.cell(h - 1, 2, "ASISTENTES")
+    for c, v in enumerate(["GRADO", "CÉDULA", "NOMBRES Y APELLIDOS", "CARGO"], start=2):
+        ws.cell(h, c, v)
+    ws.cell(h + 1, 2, "IT"); ws.cell(h + 1, 3, "80.000.111"); ws.cell(h + 1, 4, "PERSONA ENTREGA")
+    ws.cell(h + 1, 5, "FUNCIONARIO QUE ENTREGA")
+    ws.cell(h + 2, 2, "PT"); ws.cell(h + 2, 3, f"{cc:,}".replace(",", ".")); ws.cell(h + 2, 4, "PERSONA RECIBE")
+    ws.cell(h + 2, 5, "FUNCIONARIO QUE RECIBE")
+
+    wb.save(path)
+
+
+def generate_workload(folder, n_rows, items=DEFAULT_ITEMS, actas=1, seed=0):
+    """Inventario + ``actas`` actas en ``folder``. Devuelve (ruta inventario, [rutas actas])."""
+    os.makedirs(folder, exist_ok=True)
+    inv_path = os.path.join(folder, f"inventario_{n_rows}.xlsx")
+    serials = generate_inventory(inv_path, n_rows, seed=seed)
+    acta_paths = []
+    for a in range(actas):
+        path = os.path.join(folder, f"acta_{n_rows}_{a + 1}.xlsx")
+        generate_acta(path, serials, items=items, acta_no=240 + a, cc=_cedula(3 + a), seed=seed + a)
+        acta_paths.append(path)
+    return inv_path, acta_paths
+
+
+# -------- Medición --------
+class _Stages:
+    """Cronómetro por etapa con pico de memoria (tracemalloc) opcional."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.results = []
+
+    def run(self, name, fn):
+        if self.memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if self.memory else None
+        self.results.append({"stage": name, "seconds": round(elapsed, 4),
+                             "peak_mb": round(peak / 2**20, 1) if peak is not None else None})
+        return value
+
+
+def _load_inventory(inv_path):
+    # La sesión solo lee encabezados al abrir: las hojas se parsean aquí para que la lectura
+    # cuente en esta etapa y no en la primera que las pida (mapa CC, índice)
+    session = InventorySession(inv_path, use_cache=False)
+    for name in session.sheet_names:
+        session.sheets[name]
+    return session
+
+
+def _measure(inv_path, acta_path, output_mode, memory, fuzzy_mode):
+    stages = _Stages(memory)
+    if memory:
+        tracemalloc.start()
+    try:
+        acta = stages.run("acta", lambda: ActaDocument(acta_path).preload(
+            DEFAULT_START_ROW, DEFAULT_LOCATION_MODE, DEFAULT_ACTA_MODE))
+        session = stages.run("inventario", lambda: _load_inventory(inv_path))
+        stages.run("mapa_cc", lambda: session.cc_map)
+        stages.run("indice_series", lambda: session.serial_lookup)
+        if fuzzy_mode != "off":
+            stages.run("indice_parecidas", lambda: session.fuzzy_index)
+
+        inv_sheets = session.working_sheets()
+        stages.run("actualizacion", lambda: apply_acta(
+            session, inv_sheets, acta, DEFAULT_START_ROW, DEFAULT_LOCATION_MODE, DEFAULT_ACTA_MODE,
+            log=lambda msg: None, fuzzy_mode=fuzzy_mode))
+        out_path = stages.run("guardado", lambda: save_inventory(session, inv_sheets, lambda msg: None, output_mode))
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    output_bytes = os.path.getsize(out_path)
+    os.remove(out_path)
+    return stages.results, output_bytes
+
+
+def _snapshot_seconds(inv_path):
+    # Carga de todas las hojas desde la instantánea, con una carpeta de caché propia
+    previous = os.environ.get("ACTUALIZADOR_CACHE_DIR")
+    folder = tempfile.mkdtemp(prefix="actualizador_bench_cache_")
+    os.environ["ACTUALIZADOR_CACHE_DIR"] = folder
+    try:
+        session = InventorySession(inv_path)
+        for name in session.sheet_names:
+            session.sheets[name]        # crea la instantánea
+        t0 = time.perf_counter()
+        session = InventorySession(inv_path)
+        for name in session.sheet_names:
+            session.sheets[name]
+        return round(time.perf_counter() - t0, 4)
+    finally:
+        if previous is None:
+            os.environ.pop("ACTUALIZADOR_CACHE_DIR", None)
+        else:
+            os.environ["ACTUALIZADOR_CACHE_DIR"] = previous
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_size(inv_path, acta_path, output_mode=DEFAULT_OUTPUT_MODE, memory=True, fuzzy_mode=DEFAULT_FUZZY_MODE):
+    """Corre el proceso completo midiendo cada etapa. Devuelve lista de resultados."""
+    results, output_bytes = _measure(inv_path, acta_path, output_mode, memory=False, fuzzy_mode=fuzzy_mode)
+    if memory:
+        traced, _ = _measure(inv_path, acta_path, output_mode, memory=True, fuzzy_mode=fuzzy_mode)
+        for r, t in zip(results, traced):
+            r["peak_mb"] = t["peak_mb"]
+    results.append({"stage": "total", "seconds": round(sum(r["seconds"] for r in results), 4),
+                    "peak_mb": max(r["peak_mb"] for r in results) if memory else None,
+                    "output_bytes": output_bytes})
+    results.append({"stage": "instantanea", "seconds": _snapshot_seconds(inv_path), "peak_mb": None})
+    return results
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, items=DEFAULT_ITEMS, workdir=None, output_mode=DEFAULT_OUTPUT_MODE,
+                  memory=True, log=print, fuzzy_mode=DEFAULT_FUZZY_MODE):
+    """Genera (o reutiliza) un inventario por tamaño y mide. Devuelve {filas: resultados}."""
+    own_dir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="actualizador_bench_")
+    report = {}
+    try:
+        for n in sizes:
+            inv_path = os.path.join(workdir, f"inventario_{n}.xlsx")
+            acta_path = os.path.join(workdir, f"acta_{n}_1.xlsx")
+            if not (os.path.exists(inv_path) and os.path.exists(acta_path)):
+                log(f"Generando inventario de {n} filas y acta de {items} ítems...")
+                t0 = time.perf_counter()
+                generate_workload(workdir, n, items=items)
+                log(f"  generado en {time.perf_counter() - t0:.1f} s")
+            log(f"Midiendo {n} filas...")
+            report[n] = bench_size(inv_path, acta_path, output_mode=output_mode, memory=memory,
+                                   fuzzy_mode=fuzzy_mode)
+            for r in report[n]:
+                peak = f"{r['peak_mb']:>9.1f}" if r["peak_mb"] is not None else "        -"
+                log(f"  {r['stage']:<15}{r['seconds']:>9.3f} s {peak} MB")
+    finally:
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+# --- Arranque de la GUI (en un proceso nuevo, como al abrir el programa)
+_STARTUP_PROBE = """
+import json, os, sys, time
+import actualizador_inventario_gui as gui
+result = {"import_ready": time.time(), "heavy_modules": [m for m in %r if m in sys.modules]}
+try:
+    app = gui.App()
+    app.update()
+    result["window_ready"] = time.time()
+except Exception as e:   # sin pantalla (servidor): solo se mide la importación
+    result["window_error"] = str(e)
+print(json.dumps(result), flush=True)
+os._exit(0)   # no esperar al núcleo que la ventana empezó a cargar en segundo plano
+"""
+
+
+def startup_check(target=DEFAULT_STARTUP_TARGET):
+    """Lanza la GUI en un proceso nuevo y mide cuánto tarda la ventana en estar lista.
+
+    Devuelve {"startup_seconds", "import_seconds", "window", "heavy_modules", "target", "ok"}:
+    ok si la ventana (o la importación, si no hay pantalla) está dentro de ``target``
+    segundos y la importación no cargó ninguna de HEAVY_MODULES.
+    """
+    t0 = time.time()
+    proc = subprocess.run([sys.executable, "-c", _STARTUP_PROBE % (HEAVY_MODULES,)], capture_output=True,
+                          text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0 or not proc.stdout.strip():
+        raise RuntimeError(f"no se pudo iniciar la GUI: {proc.stderr.strip()}")
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    ready = probe.get("window_ready", probe["import_ready"])
+    result = {
+        "startup_seconds": round(ready - t0, 3),
+        "import_seconds": round(probe["import_ready"] - t0, 3),
+        "window": "window_ready" in probe,
+        "heavy_modules": probe["heavy_modules"],
+        "target": target,
+    }
+    result["ok"] = result["startup_seconds"] <= target and not result["heavy_modules"]
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="actualizador_inventario_bench",
+        description="Genera datos sintéticos y mide cada etapa del actualizador de inventario.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="filas del inventario a medir (por defecto 10000 100000 500000)")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS, help="ítems por acta")
+    parser.add_argument("--workdir", default=None,
+                        help="carpeta para los archivos generados (se reutilizan entre corridas); "
+                             "por defecto una temporal que se borra al final")
+    parser.add_argument("--output-mode", choices=("rewrite", "patch", "stream"), default=DEFAULT_OUTPUT_MODE)
+    parser.add_argument("--fuzzy", choices=("off", "suggest", "apply"), default=DEFAULT_FUZZY_MODE,
+                        help="mide también la búsqueda de series parecidas (índice + consultas)")
+    parser.add_argument("--no-memory", action="store_true", help="no medir memoria (tiempos sin tracemalloc)")
+    parser.add_argument("--json", default=None, help="guarda los resultados en este archivo JSON")
+    parser.add_argument("--generate", metavar="CARPETA", default=None,
+                        help="solo genera inventario y actas en CARPETA, sin medir")
+    parser.add_argument("--actas", type=int, default=1, help="actas a generar con --generate")
+    parser.add_argument("--startup", action="store_true",
+                        help="solo mide el arranque de la ventana; sale con 1 si supera --startup-target")
+    parser.add_argument("--startup-target", type=float, default=DEFAULT_STARTUP_TARGET,
+                        help=f"objetivo de arranque en segundos (por defecto {DEFAULT_STARTUP_TARGET:g})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.generate:
+        for n in args.sizes:
+            inv_path, acta_paths = generate_workload(args.generate, n, items=args.items, actas=args.actas)
+            print(inv_path)
+            for path in acta_paths:
+                print(path)
+        return 0
+
+    if args.startup:
+        result = startup_check(args.startup_target)
+        where = "ventana lista" if result["window"] else "importación (sin pantalla)"
+        print(f"Arranque: {result['startup_seconds']:.3f} s hasta {where} (objetivo {args.startup_target:g} s)")
+        if result["heavy_modules"]:
+            print(f"  La importación cargó: {', '.join(result['heavy_modules'])}")
+        print("OK" if result["ok"] else "FUERA DE OBJETIVO")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"startup": result}, f, indent=2)
+        return 0 if result["ok"] else 1
+
+    report = run_benchmark(args.sizes, args.items, args.workdir, args.output_mode, memory=not args.no_memory,
+                           fuzzy_mode=args.fuzzy)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"items": args.items, "output_mode": args.output_mode, "fuzzy_mode": args.fuzzy,
+                       "sizes": report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
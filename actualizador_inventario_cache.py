@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — caché en disco
+-------------------------------------------
+Archivos auxiliares (sidecar) por inventario, guardados en una carpeta local
+(%LOCALAPPDATA%\\ActualizadorInventario o ~/.cache/ActualizadorInventario; se puede
+cambiar con la variable ACTUALIZADOR_CACHE_DIR). Cada sidecar guarda la huella del
+.xlsx del que salió (tamaño, mtime y SHA-256) para saber si sigue vigente.
+
+Cualquier problema con la caché (carpeta sin permisos, archivo corrupto, versión
+vieja) se ignora: el proceso simplemente recalcula.
+
+FileCache es la caché en memoria de la misma ejecución: actas e inventarios ya
+abiertos, reutilizados mientras el archivo no cambie (previsualizar -> procesar).
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+CACHE_VERSION = 2   # 2: esquemas con columna INV (número de inventario)
+
+
+def cache_dir():
+    base = os.environ.get("ACTUALIZADOR_CACHE_DIR")
+    if not base:
+        root = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(root, "ActualizadorInventario")
+    return base
+
+
+def sidecar_path(path, kind):
+    # Un archivo por (inventario, tipo); el hash de la ruta evita choques entre carpetas
+    abs_path = os.path.normcase(os.path.abspath(path))
+    digest = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:16]
+    base = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir(), f"{base}-{digest}.{kind}")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_key(path, known=None):
+    """Huella del archivo: {"size", "mtime_ns", "sha256"}.
+
+    Si ``known`` (una huella anterior) tiene el mismo tamaño y mtime, se reutiliza su
+    hash sin volver a leer el archivo.
+    """
+    st = os.stat(path)
+    key = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if known and known.get("size") == key["size"] and known.get("mtime_ns") == key["mtime_ns"]:
+        key["sha256"] = known.get("sha256")
+    else:
+        key["sha256"] = file_sha256(path)
+    return key
+
+
+def load_sidecar(path, kind):
+    try:
+        with open(sidecar_path(path, kind), "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return None
+    return data
+
+
+def save_sidecar(path, kind, data):
+    """Escritura atómica (archivo temporal + replace); devuelve False si no se pudo."""
+    target = sidecar_path(path, kind)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(dict(data, version=CACHE_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        return False
+    return True
+
+
+# --- Caché en memoria: objetos ya abiertos, por archivo
+def file_stamp(path):
+    """(ruta absoluta, mtime_ns, tamaño), o None si no es una ruta accesible."""
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.normcase(os.path.abspath(path)), st.st_mtime_ns, st.st_size
+
+
+class FileCache:
+    """Objetos derivados de un archivo (acta abierta, sesión de inventario), reutilizados
+    mientras el archivo no cambie en disco (ruta, mtime y tamaño) y las opciones coincidan.
+
+    Se descarta primero lo menos usado al superar ``max_entries`` entradas o ``max_weight``
+    (suma de ``weigh(obj)``, p. ej. celdas en memoria). Al guardar una versión nueva de un
+    archivo se descartan las anteriores.
+    """
+
+    def __init__(self, max_entries, max_weight=None, weigh=None):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda obj: 0)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def peek(self, path, options=()):
+        """El objeto guardado para ``path`` si sigue vigente; None si no hay (no carga nada)."""
+        stamp = file_stamp(path)
+        with self._lock:
+            obj = self._entries.get((stamp, options)) if stamp else None
+            if obj is not None:
+                self._entries.move_to_end((stamp, options))
+            return obj
+
+    def get(self, path, options, load):
+        """Devuelve el objeto de ``path`` con ``options``; si no está (o cambió), lo crea con ``load()``."""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return load()
+        key = (stamp, options)
+        with self._lock:
+            obj = self._entries.get(key)
+            if obj is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return obj
+            self.misses += 1
+        # Se abre fuera del candado: puede tardar y no bloquea a otros archivos
+        obj = load()
+        with self._lock:
+            for old in [k for k in self._entries if k[0][0] == stamp[0] and k[0] != stamp]:
+                del self._entries[old]
+            self._entries[key] = obj
+            self._entries.move_to_end(key)
+            self._evict()
+        return obj
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self.max_weight is None:
+            return
+        total = sum(self.weigh(obj) for obj in self._entries.values())
+        # La entrada recién usada se conserva aunque sola supere el límite
+        while len(self._entries) > 1 and total > self.max_weight:
+            _, obj = self._entries.popitem(last=False)
+            total -= self.weigh(obj)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
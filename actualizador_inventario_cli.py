@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — línea de comandos
+----------------------------------------------
+Ejecución sin ventana (tareas programadas, servidores Linux). No importa tkinter.
+
+Uso:
+  python actualizador_inventario_cli.py INVENTARIO.xlsx ACTA.xlsx
+  python actualizador_inventario_cli.py INVENTARIO.xlsx CARPETA_ACTAS/ --json
+  python actualizador_inventario_cli.py INVENTARIO.xlsx A1.xlsx A2.xlsx --acta-mode number_only
+  python actualizador_inventario_cli.py INVENTARIO.xlsx ACTA.xlsx --dry-run --changes cambios.csv
+  python actualizador_inventario_cli.py INVENTARIO.xlsx BANDEJA/ --watch --flush-delay 60
+
+Códigos de salida:
+  0  proceso completo
+  1  error inesperado
+  2  argumentos inválidos
+  3  formato de inventario no es correcto
+  4  formato de acta no es correcto (o ninguna acta del lote es válida)
+  5  lote parcial: se generó el archivo pero alguna acta fue omitida
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from actualizador_inventario_core import (
+    DEFAULT_START_ROW,
+    DEFAULT_LOCATION_MODE,
+    DEFAULT_ACTA_MODE,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_SHEET_PRIORITY,
+    DEFAULT_FUZZY_MODE,
+    DEFAULT_FUZZY_THRESHOLD,
+    dry_run_inventory,
+    list_actas,
+    process_inventory,
+    process_batch,
+    validate_inventory,
+    validate_acta,
+    write_duplicates_report,
+)
+from actualizador_inventario_watch import (
+    DEFAULT_FLUSH_DELAY,
+    DEFAULT_MAX_DELAY,
+    DEFAULT_POLL_SECONDS,
+    InboxWatcher,
+)
+
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INVENTARIO_INVALIDO = 3
+EXIT_ACTA_INVALIDA = 4
+EXIT_PARCIAL = 5
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="actualizador_inventario_cli",
+        description="Aplica actas de asignación sobre el inventario y genera un nuevo Excel.",
+    )
+    parser.add_argument("inventario", help="Excel de inventario (.xlsx)")
+    parser.add_argument("actas", nargs="+", help="Acta(s) (.xlsx) o carpeta con actas")
+    parser.add_argument("--start-row", type=int, default=DEFAULT_START_ROW,
+                        help=f"fila de encabezados de la tabla del acta (por defecto {DEFAULT_START_ROW})")
+    parser.add_argument("--location-mode", choices=("raw", "first_token"), default=DEFAULT_LOCATION_MODE,
+                        help="raw = ubicación completa, first_token = 1ra palabra")
+    parser.add_argument("--acta-mode", choices=("prefix", "number_only"), default=DEFAULT_ACTA_MODE,
+                        help="prefix = 'ACTA No. 243', number_only = '243'")
+    parser.add_argument("--output-mode", choices=("rewrite", "patch", "stream"), default=DEFAULT_OUTPUT_MODE,
+                        help="rewrite = libro nuevo, patch = solo celdas cambiadas (conserva formato), "
+                             "stream = fila por fila con memoria acotada (usa xlsxwriter si está instalado)")
+    parser.add_argument("--sheet-priority", choices=("workbook", "fuera_last"), default=DEFAULT_SHEET_PRIORITY,
+                        help="si una serie está en varias hojas: workbook = gana la primera hoja del libro, "
+                             "fuera_last = las hojas FUERA van al final")
+    parser.add_argument("--duplicates", metavar="CSV", default=None,
+                        help="guarda en CSV las series repetidas del inventario (hoja y fila de cada una)")
+    parser.add_argument("--fuzzy", choices=("off", "suggest", "apply"), default=DEFAULT_FUZZY_MODE,
+                        help="series no encontradas: suggest = anota series parecidas (O/0, I/1, guiones, "
+                             "caracteres invertidos), apply = además actualiza la parecida si es única")
+    parser.add_argument("--fuzzy-threshold", type=float, default=DEFAULT_FUZZY_THRESHOLD,
+                        help=f"confianza mínima (0-1) de una serie parecida (por defecto {DEFAULT_FUZZY_THRESHOLD})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos para leer actas en paralelo en un lote (por defecto uno por núcleo; 1 = sin paralelismo)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="no usar ni actualizar la caché en disco del inventario (índice e instantánea de las hojas)")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="no usar la bitácora de actas aplicadas (inventario.bitacora.jsonl): "
+                             "las actas repetidas se vuelven a aplicar")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="simula una acta: calcula qué celdas cambiarían y qué filas se agregarían, sin escribir el Excel")
+    parser.add_argument("--changes", metavar="ARCHIVO", default=None,
+                        help="con --dry-run: guarda el detalle de cambios en .csv o .json")
+    parser.add_argument("--watch", action="store_true",
+                        help="modo residente: vigila la carpeta de actas (BANDEJA/), aplica cada acta al llegar "
+                             "y guarda el inventario de forma diferida; Ctrl+C guarda y termina")
+    parser.add_argument("--flush-delay", type=float, default=DEFAULT_FLUSH_DELAY,
+                        help=f"con --watch: segundos sin actas nuevas antes de guardar (por defecto {DEFAULT_FLUSH_DELAY:g})")
+    parser.add_argument("--flush-max", type=float, default=DEFAULT_MAX_DELAY,
+                        help=f"con --watch: espera máxima para guardar desde la primera acta pendiente "
+                             f"(por defecto {DEFAULT_MAX_DELAY:g})")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f"con --watch: segundos entre revisiones de la carpeta (por defecto {DEFAULT_POLL_SECONDS:g})")
+    parser.add_argument("--report", action="store_true",
+                        help="guarda tiempos por etapa y contadores en un .json junto al Excel generado")
+    parser.add_argument("--json", action="store_true",
+                        help="imprime el resumen en JSON por la salida estándar")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="no mostrar el registro de avance (stderr)")
+    return parser
+
+
+def _items(stats):
+    # Ítems del informe (uno por ítem del acta, con su origen) -> al resumen del acta, sin repetirlos en stats
+    return [{k: v for k, v in m.items() if k != "acta"} for m in stats.pop("items", [])]
+
+
+def _origin_counts(items):
+    counts = {}
+    for m in items:
+        counts[m["origen"]] = counts.get(m["origen"], 0) + 1
+    return ", ".join(f"{origin} {n}" for origin, n in counts.items())
+
+
+def _print_summary(result):
+    if result.get("changes") is not None:
+        changes = result["changes"]
+        print(f"Simulación (no se generó archivo): cambiarían {len(changes['cells'])} celdas, "
+              f"se agregarían {len(changes['appended'])} filas")
+    else:
+        print(f"Archivo generado: {result['output'] or '-'}")
+    for item in result["actas"]:
+        name = os.path.basename(item["acta"])
+        if "error" in item:
+            print(f"{name}: ERROR — {item['error']}")
+        elif item.get("skipped"):
+            print(f"{name}: {item['acta_text']} ya aplicada según la bitácora (se omitió)")
+        else:
+            print(f"{name}: {item['acta_text']} ({item['date_str']}) — responsable {item['responsable']}, "
+                  f"actualizados {item['updated']}, agregados a SIN SERIAL {item['added']}")
+            if item.get("items"):
+                print(f"  ítems por origen: {_origin_counts(item['items'])}")
+
+
+def run(args, log):
+    """Ejecuta el proceso y devuelve (código de salida, resumen)."""
+    result = {"ok": False, "output": None, "actas": [], "error": None, "stats": None}
+
+    try:
+        session = validate_inventory(args.inventario, use_cache=not args.no_cache, sheet_priority=args.sheet_priority)
+    except ValueError as ve:
+        result["error"] = str(ve)
+        return EXIT_INVENTARIO_INVALIDO, result
+
+    if args.duplicates:
+        n = write_duplicates_report(session, args.duplicates)
+        log(f"Series repetidas en el inventario: {n} (detalle en {args.duplicates})\n")
+
+    if args.watch:
+        return run_watch(args, session, log, result)
+    if args.dry_run:
+        return run_dry(args, session, log, result)
+
+    actas = [a for src in args.actas for a in list_actas(src, session.path)]
+
+    # Una sola acta: mismo flujo que el botón "Procesar" de la GUI
+    if len(actas) == 1:
+        try:
+            acta = validate_acta(actas[0])
+        except ValueError as ve:
+            result["error"] = str(ve)
+            result["actas"].append({"acta": actas[0], "error": str(ve)})
+            return EXIT_ACTA_INVALIDA, result
+
+        out_path, meta, resp, updated, added, stats = process_inventory(
+            session, acta, args.start_row, args.location_mode, args.acta_mode, log,
+            output_mode=args.output_mode, report=args.report,
+            fuzzy_mode=args.fuzzy, fuzzy_threshold=args.fuzzy_threshold, use_journal=not args.no_journal
+        )
+        result.update(ok=True, output=out_path, stats=stats)
+        result["actas"].append({
+            "acta": actas[0],
+            "acta_text": meta.get("acta_text"),
+            "date_str": meta.get("date_str"),
+            "location_code": meta.get("location_code"),
+            "responsable": resp,
+            "updated": updated,
+            "added": added,
+            "items": _items(stats),
+        })
+        if stats["counters"].get("actas_skipped"):
+            result["actas"][-1]["skipped"] = True
+        return EXIT_OK, result
+
+    out_path, summary, stats = process_batch(
+        session, actas, args.start_row, args.location_mode, args.acta_mode, log, workers=args.workers,
+        output_mode=args.output_mode, report=args.report,
+        fuzzy_mode=args.fuzzy, fuzzy_threshold=args.fuzzy_threshold, use_journal=not args.no_journal
+    )
+    stats.pop("items", None)      # ya van en cada acta del resumen
+    result["output"] = out_path
+    result["actas"] = summary
+    result["stats"] = stats
+    if not out_path:
+        result["error"] = "NINGUNA ACTA VALIDA"
+        return EXIT_ACTA_INVALIDA, result
+    result["ok"] = True
+    if any("error" in item for item in summary):
+        return EXIT_PARCIAL, result
+    return EXIT_OK, result
+
+
+def run_dry(args, session, log, result):
+    """Simulación (--dry-run) de una sola acta: no escribe el Excel."""
+    if len(args.actas) != 1 or os.path.isdir(args.actas[0]):
+        result["error"] = "CON --dry-run SE INDICA UNA SOLA ACTA"
+        return EXIT_USAGE, result
+    try:
+        acta = validate_acta(args.actas[0])
+    except ValueError as ve:
+        result["error"] = str(ve)
+        result["actas"].append({"acta": args.actas[0], "error": str(ve)})
+        return EXIT_ACTA_INVALIDA, result
+
+    changes, meta, resp, updated, added, stats = dry_run_inventory(
+        session, acta, args.start_row, args.location_mode, args.acta_mode, log,
+        fuzzy_mode=args.fuzzy, fuzzy_threshold=args.fuzzy_threshold, changes_path=args.changes,
+        use_journal=not args.no_journal
+    )
+    result.update(ok=True, stats=stats, changes=changes.as_dict())
+    result["actas"].append({
+        "acta": args.actas[0],
+        "acta_text": meta.get("acta_text"),
+        "date_str": meta.get("date_str"),
+        "location_code": meta.get("location_code"),
+        "responsable": resp,
+        "updated": updated,
+        "added": added,
+        "items": _items(stats),
+    })
+    if stats["counters"].get("actas_skipped"):
+        result["actas"][-1]["skipped"] = True
+    return EXIT_OK, result
+
+
+def run_watch(args, session, log, result):
+    """Modo residente (--watch) sobre la carpeta BANDEJA; termina con Ctrl+C."""
+    if len(args.actas) != 1 or not os.path.isdir(args.actas[0]):
+        result["error"] = "CON --watch SE INDICA UNA SOLA CARPETA DE ACTAS"
+        return EXIT_USAGE, result
+    try:
+        watcher = InboxWatcher(
+            session, args.actas[0], log, start_row=args.start_row, location_mode=args.location_mode,
+            acta_mode=args.acta_mode, output_mode=args.output_mode, fuzzy_mode=args.fuzzy,
+            fuzzy_threshold=args.fuzzy_threshold, flush_delay=args.flush_delay, max_delay=args.flush_max,
+            use_journal=not args.no_journal,
+        )
+    except ValueError as ve:
+        result["error"] = str(ve)
+        return EXIT_USAGE, result
+    watcher.run(poll_seconds=args.poll)
+    log("\n" + watcher.stats.log_text())
+
+    result.update(ok=True, output=watcher.outputs[-1] if watcher.outputs else None,
+                  outputs=watcher.outputs, stats=watcher.stats.as_dict())
+    result["actas"] = watcher.applied + watcher.failed
+    if watcher.pending:
+        result["error"] = "QUEDARON ACTAS SIN GUARDAR"
+        return EXIT_ERROR, result
+    return (EXIT_PARCIAL if watcher.failed else EXIT_OK), result
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.changes and not args.dry_run:
+        parser.error("--changes se usa junto con --dry-run")
+    if args.changes and not args.changes.lower().endswith((".csv", ".json")):
+        parser.error("--changes debe terminar en .csv o .json")
+
+    def log(msg):
+        if not args.quiet:
+            sys.stderr.write(msg)
+            sys.stderr.flush()
+
+    try:
+        code, result = run(args, log)
+    except Exception as e:
+        code, result = EXIT_ERROR, {"ok": False, "output": None, "actas": [], "error": str(e), "stats": None}
+
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    elif result["error"] and not result["actas"]:
+        print(f"ERROR: {result['error']}", file=sys.stderr)
+    else:
+        _print_summary(result)
+    return code
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — configuración por defecto
+------------------------------------------------------
+Valores por defecto de las opciones de procesamiento. Módulo liviano (sin pandas
+ni openpyxl): la ventana lo importa para mostrarse sin esperar al núcleo.
+"""
+
+DEFAULT_START_ROW = 26                 # Fila donde empiezan los encabezados en la tabla del acta
+DEFAULT_LOCATION_MODE = "raw"          # "raw" | "first_token"
+DEFAULT_ACTA_MODE = "prefix"           # "prefix" | "number_only"
+DEFAULT_OUTPUT_MODE = "rewrite"        # "rewrite" (reescribe todo) | "patch" (solo celdas cambiadas, conserva formato)
+                                       # | "stream" (fila por fila, memoria acotada para inventarios enormes)
+DEFAULT_SHEET_PRIORITY = "workbook"    # serie en varias hojas: "workbook" (gana la 1ra hoja del libro)
+                                       # | "fuera_last" (hojas FUERA al final) | lista explícita de hojas
+DEFAULT_FUZZY_MODE = "off"             # series no encontradas: "off" | "suggest" (solo avisa parecidas)
+                                       # | "apply" (actualiza la parecida si es única y supera el umbral)
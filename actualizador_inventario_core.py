@@ -0,0 +1,2195 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — lógica de procesamiento
+----------------------------------------------------
+Lectura de actas e inventario, actualización y guardado. No depende de
+tkinter: la usan tanto la GUI como la línea de comandos.
+
+Requisitos:
+  pip install pandas openpyxl
+  (opcional) pip install xlsxwriter   -> escritura "stream" más rápida
+  (opcional) pip install pyarrow      -> instantánea del inventario en Feather
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import cached_property, lru_cache
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ERROR_CODES
+from openpyxl.styles import Alignment, Border, Font, Side
+
+try:  # opcional: backend más rápido para el modo "stream"
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from pandas.io.parsers import TextParser
+
+from actualizador_inventario_cache import FileCache, file_sha256, load_sidecar, save_sidecar, source_key
+from actualizador_inventario_config import (   # config por defecto (módulo liviano, lo usa la GUI)
+    DEFAULT_START_ROW,
+    DEFAULT_LOCATION_MODE,
+    DEFAULT_ACTA_MODE,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_SHEET_PRIORITY,
+    DEFAULT_FUZZY_MODE,
+)
+from actualizador_inventario_fuzzy import DEFAULT_FUZZY_THRESHOLD, FuzzySerialIndex
+from actualizador_inventario_journal import Journal
+from actualizador_inventario_snapshot import InventorySnapshot
+
+
+# -------- Patrones (compilados una sola vez) --------
+_DASH = r"[-–—]"
+PATTERNS = {
+    # texto general
+    "spaces":        re.compile(r"\s+"),
+    "non_digits":    re.compile(r"\D"),
+    "trailing_seps": re.compile(r"[|:;,]+$"),
+    "trailing_dash": re.compile(rf"(?:\s*{_DASH}\s*)+$"),
+    "loc_junk":      re.compile(r"[^A-Za-zÁÉÍÓÚÑÜ0-9\s\-]"),
+    # ubicación y encabezado del acta
+    "loc_stop":      re.compile(r"(OBJETIVO|ASIGNACI[ÓO]N|RESPONSABLES?|NOMBRES?|INFORMACI[ÓO]N\s+P[ÚU]BLICA|FIRMA|CARGO)", re.IGNORECASE),
+    "objetivo_tail": re.compile(r"\bOBJETIVO\b.*$", re.IGNORECASE),
+    "objetivo":      re.compile(r"\bOBJETIVO\b", re.IGNORECASE),
+    "acta_no":       re.compile(r"ACTA\s*No\.?\s*([A-Za-z0-9\-_/]+)", re.IGNORECASE),
+    "dipol_grise":   re.compile(rf"DIPOL\s*{_DASH}\s*GRISE\s*{_DASH}\s*([A-Za-zÁÉÍÓÚÑÜ0-9\s\-\:\|\.\,]+)", re.IGNORECASE),
+    "end_marker":    re.compile(r"OBSERVACIONES\s+Y\s+RECOMENDACIONES", re.IGNORECASE),
+    # tabla de ASISTENTES
+    "hdr_grado":     re.compile(r"\bGRADO\b"),
+    "hdr_cedula":    re.compile(r"\bC[ÉE]DULA\b"),
+    "hdr_nombres":   re.compile(r"\bNOMBRES(\s+Y\s+APELLIDOS)?\b"),
+    "hdr_cargo":     re.compile(r"\bCARGO\b"),
+    "recibe":        re.compile(r"\bFUNCIONARIO\s+QUE\s+RECIBE\b", re.IGNORECASE),
+    "recibe_label":  re.compile(r"FUNCIONARIO\s+QUE\s+RECIBE", re.IGNORECASE),
+    "id_labels":     re.compile(r"(CC|C[ÉE]DULA|DOC(?:UMENTO)?|IDENTIDAD|N[°O]\.?)\s*[:\-]?", re.IGNORECASE),
+    "long_digits":   re.compile(r"\d{6,}"),
+    "name_junk":     re.compile(r"[^A-Za-zÁÉÍÓÚÑáéíóúüÜ\s\.\-]"),
+    # hojas del inventario
+    "cc_word":       re.compile(r"\bcc\b", re.IGNORECASE),
+    "cc_any":        re.compile(r"cc", re.IGNORECASE),
+    "cc_col":        re.compile(r"\bCC\b"),
+    "sin_serial":    re.compile(r"SIN\s*SERIAL", re.IGNORECASE),
+    # archivos generados: "<inventario> 14NOV25 - 10_35.xlsx" (una marca por cada corrida encadenada)
+    "output_stamps": re.compile(r"(?: \d{2}[A-Z]{3}\d{2} - \d{2}_\d{2})+$", re.IGNORECASE),
+}
+
+# Columnas de la tabla de ítems del acta: rol -> patrones (sobre encabezado normalizado)
+def _compile_all(*patterns):
+    return tuple(re.compile(p) for p in patterns)
+
+ITEM_COLUMNS = (
+    ("DESC",     _compile_all(r"DESCRIPCI[ÓO]N DEL ACTIVO", r"DESCRIPCI[ÓO]N DEL ACTIVO [ÓO] BIEN", r"DESCRIPCI[ÓO]N DEL BIEN")),
+    ("DESC2",    _compile_all(r"DESCRIPCI[ÓO]N ADICIONAL", r"ACCESORIOS")),
+    ("SERIE",    _compile_all(r"N[ÚU]MERO DE SERIE", r"N[ÚU]MERO DE SERIE DEL BIEN", r"SERIE DEL BIEN")),
+    ("INV",      _compile_all(r"N[ÚU]MERO INVENTARIO", r"C[ÓO]DIGO SAP", r"R6 SILOG")),
+    ("VALOR",    _compile_all(r"VALOR DE ADQUISICI[ÓO]N")),
+    ("CANTIDAD", _compile_all(r"CANTIDAD")),
+    ("OBS",      _compile_all(r"\bOBSERVACION(?:ES)?\b", r"\bOBSERVACIONES DEL ELEMENTO\b", r"\bOBSERVACIONES\b")),
+)
+
+# Columnas que actualiza el proceso en las hojas del inventario (sin distinguir mayúsculas)
+UPDATE_COLUMNS = (
+    ("SERIE",    re.compile(r"NUMERO DE SERIE", re.IGNORECASE)),
+    ("RESP",     re.compile(r"\bRESPONSABLE\b", re.IGNORECASE)),
+    ("UBIC",     re.compile(r"UBICACI[ÓO]N", re.IGNORECASE)),
+    ("ACTA",     re.compile(r"(NO\.?\s*ACTA|NUMERO DE ACTA)", re.IGNORECASE)),
+    ("FECHA",    re.compile(r"FECHA ULTIMA ASIGNACION", re.IGNORECASE)),
+    ("OBS_UNIT", re.compile(r"OBSERVACIONES? UNIDAD", re.IGNORECASE)),
+    ("INV",      re.compile(r"N[ÚU]MERO (DE )?INVENTARIO|C[ÓO]DIGO SAP|R6 SILOG", re.IGNORECASE)),
+)
+# Hojas "FUERA": alternativas si no aparece la columna general
+FUERA_COLUMNS = (
+    ("SERIE", re.compile(r"NUMERO DE SERIE ELEMENTO", re.IGNORECASE)),
+    ("ACTA",  re.compile(r"NUMERO DE ACTA|NO\.?\s*ACTA", re.IGNORECASE)),
+)
+
+
+# -------- Utilidades --------
+ES_MONTHS = {
+    "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6,
+    "JULIO": 7, "AGOSTO": 8, "SEPTIEMBRE": 9, "SETIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12,
+    "ENE": 1, "FEB": 2, "MAR": 3, "ABR": 4, "MAY": 5, "JUN": 6, "JUL": 7, "AGO": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DIC": 12
+}
+ES_ABBR = {1:"ENE",2:"FEB",3:"MAR",4:"ABR",5:"MAY",6:"JUN",7:"JUL",8:"AGO",9:"SEP",10:"OCT",11:"NOV",12:"DIC"}
+
+def norm_str(x):
+    if x is None:
+        return ""
+    # Evita que 'N/A' sea procesado como NaN o se pierda
+    s = str(x)
+    return s.strip()
+
+def norm_serial(x):
+    s = norm_str(x)
+    return PATTERNS["spaces"].sub("", s).upper()
+
+def try_int(x):
+    try:
+        return int(str(x).strip())
+    except Exception:
+        return None
+
+def format_stamp(dt: datetime) -> str:
+    # "14NOV25 - 10_35"
+    return f"{dt.day:02d}{ES_ABBR[dt.month]}{dt.year%100:02d} - {dt.hour:02d}_{dt.minute:02d}"
+
+# --- Valores de la primera hoja, leídos una sola vez en modo solo lectura
+class ValueGrid:
+    """Filas de valores (tuplas) con acceso 1-based como ``ws.cell(r, c).value``.
+
+    Fuera de rango devuelve None. No guarda estilos ni objetos de celda.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.max_row = len(rows)
+        self.max_column = max((len(row) for row in rows), default=0)
+
+    @classmethod
+    def from_xlsx(cls, path):
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            ws.reset_dimensions()   # no confiar en la dimensión declarada en el archivo
+            rows = []
+            for values in ws.iter_rows(values_only=True):
+                values = list(values)
+                while values and values[-1] is None:
+                    values.pop()
+                rows.append(tuple(values))
+        finally:
+            wb.close()
+        while rows and not rows[-1]:
+            rows.pop()
+        return cls(rows)
+
+    def value(self, r, c):
+        if 1 <= r <= self.max_row:
+            row = self.rows[r - 1]
+            if 1 <= c <= len(row):
+                return row[c - 1]
+        return None
+
+
+# --- util: primer valor no vacío a la derecha, en la misma fila
+def first_right_value(grid, r, c_start, max_jump=6):
+    for c in range(c_start+1, c_start+1+max_jump):
+        v = grid.value(r, c)
+        if v is not None and str(v).strip():
+            return v
+    return None
+
+
+def clean_location(raw: str, mode="raw") -> str:
+    if not raw:
+        return raw
+    # 1) corta en palabras que no pertenecen a la ubicación
+    raw = PATTERNS["loc_stop"].split(raw)[0]
+
+    # 2) limpia separadores y basura
+    raw = PATTERNS["objetivo_tail"].sub("", raw)      # redundante por seguridad
+    raw = PATTERNS["trailing_dash"].sub("", raw)      # guiones al final
+    raw = PATTERNS["trailing_seps"].sub("", raw)      # otros separadores finales
+    raw = PATTERNS["loc_junk"].sub(" ", raw)          # caracteres raros
+    raw = PATTERNS["spaces"].sub(" ", raw).strip()
+
+    # 3) si sigue muy largo, quédate con las primeras 2–4 palabras útiles
+    tokens = raw.split()
+    if len(tokens) >= 5:
+        raw = " ".join(tokens[:4])   # ajusta 3/4 si prefieres más corto
+
+    if mode == "first_token":
+        raw = tokens[0] if tokens else raw
+
+    return raw
+
+
+# --- Fecha del acta en fila 8 (cajas: DD / MM / AA o AÑO/ANIO)
+def parse_row8_date(grid):
+    r = 8
+    max_c = grid.max_column
+    day = mon = year = None
+
+    def cell_txt(rr, cc):
+        v = grid.value(rr, cc)
+        return str(v).strip().upper() if v is not None else ""
+
+    for c in range(1, max_c+1):
+        t = cell_txt(r, c)
+
+        # DD
+        if t in ("DD", "DIA", "DÍA"):
+            raw = first_right_value(grid, r, c)
+            try:
+                d = int(str(raw).strip())
+                if 1 <= d <= 31:
+                    day = d
+            except Exception:
+                pass
+
+        # MM
+        if t in ("MM", "MES"):
+            raw = first_right_value(grid, r, c)
+            try:
+                m = int(str(raw).strip())
+                if 1 <= m <= 12:
+                    mon = m
+            except Exception:
+                pass
+
+        # AA / AÑO / ANIO
+        if t in ("AA", "AÑO", "ANIO", "AÑO"):
+            raw = first_right_value(grid, r, c)
+            if raw is not None:
+                s = str(raw).strip()
+                if s.isdigit():
+                    y = int(s)
+                    if 0 <= y <= 99:
+                        year = 2000 + y
+                    elif 1900 <= y <= 2100:
+                        year = y
+
+    # Fallback: todos los números de la fila 8, en orden de aparición
+    if day is None or mon is None or year is None:
+        nums = []
+        for c in range(1, max_c+1):
+            v = grid.value(r, c)
+            if v is None:
+                continue
+            s = str(v).strip()
+            if s.isdigit():
+                nums.append((int(s), c))
+        for i in range(len(nums)):
+            for j in range(i+1, len(nums)):
+                for k in range(j+1, len(nums)):
+                    d, _ = nums[i]
+                    m, _ = nums[j]
+                    y, _ = nums[k]
+                    if 1 <= d <= 31 and 1 <= m <= 12:
+                        if 0 <= y <= 99:
+                            y = 2000 + y
+                        if 1900 <= y <= 2100:
+                            day, mon, year = d, m, y
+                            break
+                if day and mon and year:
+                    break
+            if day and mon and year:
+                break
+
+    return datetime(year, mon, day) if (day and mon and year) else None
+
+
+# --- Responsable: detectar en tabla de ASISTENTES (CÉDULA / NOMBRES / CARGO)
+# --- Responsable: detectar en tabla de ASISTENTES (GRADO / CÉDULA / NOMBRES / CARGO)
+def find_responsable(grid):
+    max_row, max_col = grid.max_row, grid.max_column
+
+    def norm_cell(v):
+        return str(v).strip().upper() if v is not None else ""
+
+    # 1) Localizar fila de encabezados
+    header_row = None
+    col_idx = {"GRADO": None, "CEDULA": None, "NOMBRES": None, "CARGO": None}
+
+    for r in range(1, min(max_row, 400) + 1):
+        row_labels = [norm_cell(grid.value(r, c)) for c in range(1, min(max_col, 60) + 1)]
+        row_text = " | ".join(row_labels)
+
+        has_ced = ("CÉDULA" in row_text) or ("CEDULA" in row_text)
+        has_nom = ("NOMBRES" in row_text) or ("NOMBRES Y APELLIDOS" in row_text)
+        has_car = ("CARGO" in row_text)
+
+        if has_ced and has_nom and has_car:
+            header_row = r
+            for c, lab in enumerate(row_labels, start=1):
+                if PATTERNS["hdr_grado"].search(lab):
+                    col_idx["GRADO"] = c
+                if PATTERNS["hdr_cedula"].search(lab):
+                    col_idx["CEDULA"] = c
+                if PATTERNS["hdr_nombres"].search(lab):
+                    col_idx["NOMBRES"] = c
+                if PATTERNS["hdr_cargo"].search(lab):
+                    col_idx["CARGO"] = c
+            break
+
+    # 2) Buscar fila con CARGO = "FUNCIONARIO QUE RECIBE"
+    if header_row and col_idx["CEDULA"] and col_idx["NOMBRES"] and col_idx["CARGO"]:
+        for r in range(header_row + 1, min(header_row + 120, max_row) + 1):
+            cargo = norm_cell(grid.value(r, col_idx["CARGO"]))
+            if PATTERNS["recibe"].search(cargo):
+                # extraer CC, NOMBRE y (opcional) GRADO
+                cc_raw = grid.value(r, col_idx["CEDULA"])
+                name_raw = grid.value(r, col_idx["NOMBRES"])
+                grade_raw = grid.value(r, col_idx["GRADO"]) if col_idx["GRADO"] else None
+
+                cc = None
+                if cc_raw is not None:
+                    d = PATTERNS["non_digits"].sub("", str(cc_raw))
+                    if d.isdigit() and 6 <= len(d) <= 12:
+                        cc = d
+
+                name = None
+                if name_raw is not None:
+                    s = str(name_raw).strip()
+                    name = PATTERNS["spaces"].sub(" ", s) or None
+
+                grade = None
+                if grade_raw is not None:
+                    g = str(grade_raw).strip()
+                    grade = PATTERNS["spaces"].sub(" ", g).upper() or None
+
+                return cc, name, grade
+
+    # 3) Respaldo: ventana alrededor del rótulo (sin grado garantizado)
+    patt = PATTERNS["recibe_label"]
+    label_r = label_c = None
+    for r in range(1, min(max_row, 200) + 1):
+        for c in range(1, min(max_col, 50) + 1):
+            v = grid.value(r, c)
+            if isinstance(v, str) and patt.search(v):
+                label_r, label_c = r, c
+                break
+        if label_r:
+            break
+
+    if not label_r:
+        return None, None, None
+
+    def harvest_window(rr, cc_label, left_cols=12, right_cols=12, rows_up=1, rows_down=2):
+        r0 = max(1, rr - rows_up)
+        r1 = min(max_row, rr + rows_down)
+        cL = max(1, cc_label - left_cols)
+        cR = min(max_col, cc_label + right_cols)
+
+        left_texts, right_texts = [], []
+        left_digits, right_digits = [], []
+
+        for r in range(r0, r1 + 1):
+            for c in range(cL, cc_label):  # izquierda
+                s = norm_cell(grid.value(r, c))
+                if not s:
+                    continue
+                left_texts.append(s)
+                d = PATTERNS["non_digits"].sub("", s)
+                if d.isdigit() and 6 <= len(d) <= 12:
+                    left_digits.append(d)
+            for c in range(cc_label + 1, cR + 1):  # derecha
+                s = norm_cell(grid.value(r, c))
+                if not s:
+                    continue
+                right_texts.append(s)
+                d = PATTERNS["non_digits"].sub("", s)
+                if d.isdigit() and 6 <= len(d) <= 12:
+                    right_digits.append(d)
+
+        return (left_texts, left_digits, right_texts, right_digits)
+
+    left_texts, left_digits, right_texts, right_digits = harvest_window(label_r, label_c)
+    cc = left_digits[0] if left_digits else (right_digits[0] if right_digits else None)
+
+    def clean_name(txts):
+        joined = " ".join(txts)
+        joined = PATTERNS["id_labels"].sub(" ", joined)
+        joined = PATTERNS["long_digits"].sub(" ", joined)
+        joined = PATTERNS["name_junk"].sub(" ", joined)
+        return PATTERNS["spaces"].sub(" ", joined).strip() or None
+
+    nombre = clean_name(right_texts) or clean_name(left_texts)
+    grade = None  # en el respaldo no es fiable detectar grado
+    return cc, nombre, grade
+
+
+
+# --- Valor de celda como lo entrega pandas.read_excel (motor openpyxl)
+def _excel_scalar(v):
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        return np.nan if v in ERROR_CODES else v
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        i = int(v)
+        return i if i == v else float(v)
+    return v
+
+
+def frame_from_grid(grid, header_row, nrows=None):
+    """Equivale a ``pd.read_excel(..., header=header_row-1, dtype=str, keep_default_na=False)``
+    pero sobre la grilla ya leída."""
+    rows = grid.rows
+    if nrows is not None:
+        rows = rows[:header_row + nrows]   # read_excel corta aquí antes de quitar filas vacías finales
+    data = []
+    last = -1
+    for i, row in enumerate(rows):
+        values = [_excel_scalar(v) for v in row]
+        while values and values[-1] == "":
+            values.pop()
+        if values:
+            last = i
+        data.append(values)
+    data = data[:last + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(values) for values in data)
+    data = [values + [""] * (width - len(values)) for values in data]
+    parser = TextParser(data, header=header_row - 1, dtype=str, nrows=nrows,
+                        keep_default_na=False, skip_blank_lines=False)
+    return parser.read(nrows=nrows)
+
+
+# --- ACTA abierta una sola vez: validación, metadatos, marcador de fin e ítems
+#     comparten la misma grilla de valores (libro leído en modo solo lectura).
+class ActaDocument:
+    def __init__(self, path):
+        self.path = path
+        self.grid = ValueGrid.from_xlsx(path)
+        self._meta = {}
+        self._items = {}
+
+    def __getstate__(self):
+        # Para pasar entre procesos: solo lo ya calculado, sin la grilla
+        state = self.__dict__.copy()
+        state["grid"] = None
+        return state
+
+    @property
+    def cell_count(self):
+        # Peso aproximado en memoria (para el desalojo de ACTA_CACHE)
+        return sum(len(row) for row in self.grid.rows) if self.grid is not None else 0
+
+    @cached_property
+    def content_hash(self):
+        # Huella del archivo para la bitácora de actas aplicadas
+        return file_sha256(self.path)
+
+    def preload(self, start_row=DEFAULT_START_ROW, location_mode=DEFAULT_LOCATION_MODE, acta_mode=DEFAULT_ACTA_MODE):
+        """Calcula de una vez todo lo que usa el proceso (fecha, responsable, metadatos, ítems)."""
+        self.meta(location_mode, acta_mode)
+        self.items(start_row)
+        return self
+
+    @cached_property
+    def row8_date(self):
+        return parse_row8_date(self.grid)
+
+    @cached_property
+    def responsable(self):
+        return find_responsable(self.grid)
+
+    # --- Localiza la fila donde aparece el final del listado ("OBSERVACIONES Y RECOMENDACIONES")
+    @cached_property
+    def end_marker_row(self):
+        patt = PATTERNS["end_marker"]
+        for r, row in enumerate(self.grid.rows, start=1):
+            for v in row:
+                if isinstance(v, str) and patt.search(v):
+                    return r
+        return None
+
+    def meta(self, location_mode=DEFAULT_LOCATION_MODE, acta_mode=DEFAULT_ACTA_MODE):
+        key = (location_mode, acta_mode)
+        if key not in self._meta:
+            self._meta[key] = _extract_acta_meta(self, location_mode, acta_mode)
+        return dict(self._meta[key])
+
+    # --- Lee la tabla de la ACTA y corta en el marcador de fin
+    def items(self, start_row=DEFAULT_START_ROW):
+        if start_row not in self._items:
+            end_marker_row = self.end_marker_row
+            # nrows = cantidad de filas de datos por debajo del encabezado, hasta (antes de) el marcador
+            nrows = None
+            if end_marker_row and end_marker_row > start_row:
+                nrows = (end_marker_row - 1) - start_row  # antes del rótulo
+
+            # Mantener 'N/A' literal; se reutiliza la grilla ya cargada (sin releer el .xlsx)
+            df = frame_from_grid(self.grid, start_row, nrows=nrows)
+            df.columns = [PATTERNS["spaces"].sub(" ", str(c)).strip() for c in df.columns]
+            # no dropna(how="all") para no perder filas con "N/A"; pero sí eliminar filas realmente vacías
+            df = df[~df.isna().all(axis=1)]
+            self._items[start_row] = df
+        return self._items[start_row].copy()
+
+
+def open_acta(acta):
+    """Acepta una ruta o un ActaDocument ya abierto y devuelve el documento.
+
+    Una ruta ya abierta antes (y sin cambios en disco) devuelve el mismo documento,
+    con sus metadatos e ítems ya calculados (ACTA_CACHE).
+    """
+    if isinstance(acta, ActaDocument):
+        return acta
+    return ACTA_CACHE.get(acta, (), lambda: ActaDocument(acta))
+
+
+def find_end_marker_row(acta):
+    return open_acta(acta).end_marker_row
+
+
+def improved_find_acta_meta_xlsx(acta, location_mode=DEFAULT_LOCATION_MODE, acta_mode=DEFAULT_ACTA_MODE):
+    return open_acta(acta).meta(location_mode, acta_mode)
+
+
+def _extract_acta_meta(doc, location_mode, acta_mode):
+    grid = doc.grid
+
+    # === Fecha exacta desde fila 8 (DD/MM/AA)
+    found_date = doc.row8_date
+
+    # Construyo blob para patrones (ACTA, ubicación)
+    lines = []
+    for r in range(1, 80):
+        vals = []
+        for c in range(1, 20):
+            v = grid.value(r, c)
+            if v is not None:
+                vals.append(str(v))
+        if vals:
+            lines.append(" | ".join(vals))
+    blob = "\n".join(lines)
+
+    date_str = found_date.strftime("%Y-%m-%d") if found_date else None
+
+    # === ACTA No.
+    acta_no = None
+    m = PATTERNS["acta_no"].search(blob)
+    if m:
+        acta_no = m.group(1).strip()
+    if acta_mode == "number_only" and acta_no:
+        acta_text = acta_no
+    elif acta_no:
+        acta_text = f"ACTA No. {acta_no}"
+    else:
+        acta_text = "ACTA"
+
+    # === Ubicación DIPOL - GRISE - XXX (cortar estrictamente en "OBJETIVO")
+    loc_code = None
+    loc_pat = PATTERNS["dipol_grise"]
+
+    m = loc_pat.search(blob)
+    if m:
+        loc_code = m.group(1).strip()
+    if not loc_code:
+        for r in (14, 15):
+            row_text = " ".join([str(grid.value(r, c)) for c in range(1, 15) if grid.value(r, c) is not None])
+            m2 = loc_pat.search(row_text)
+            if m2:
+                loc_code = m2.group(1).strip()
+                break
+
+    if loc_code:
+        # 1) Dejar estrictamente lo anterior a "OBJETIVO"
+        loc_code = PATTERNS["objetivo"].split(loc_code)[0]
+
+        # 2) Limpieza de separadores finales y espacios
+        loc_code = PATTERNS["trailing_seps"].sub("", loc_code)
+        loc_code = PATTERNS["trailing_dash"].sub("", loc_code)  # guiones al final
+        loc_code = PATTERNS["loc_junk"].sub(" ", loc_code)
+        loc_code = PATTERNS["spaces"].sub(" ", loc_code).strip()
+
+        # 3) first_token si se solicita
+        if location_mode == "first_token":
+            parts = loc_code.split()
+            loc_code = parts[0] if parts else loc_code
+
+    # === Responsable (solo CC; el nombre final se resuelve con Hoja CC en process_inventory)
+    recipient_cc, recipient_name, recipient_grade = doc.responsable
+
+    return {
+        "date_str": date_str,
+        "acta_text": acta_text,
+        "location_code": loc_code,
+        "recipient_cc": recipient_cc,
+        "recipient_name": recipient_name,
+        "recipient_grade": recipient_grade,
+    }
+
+
+
+
+
+def find_cc_sheet(sheet_names):
+    for name in sheet_names:
+        if name.strip().lower() in ["hoja cc", "cc"] or PATTERNS["cc_word"].search(name):
+            return name
+    for name in sheet_names:
+        if PATTERNS["cc_any"].search(name):
+            return name
+    return None
+
+
+def find_sin_serial_sheet(sheet_names):
+    return next((n for n in sheet_names if PATTERNS["sin_serial"].search(n)), None)
+
+
+class CCMap(dict):
+    """CC (solo dígitos) -> "GRADO. NOMBRE" de la Hoja CC.
+
+    ``resolve`` normaliza la cédula tal como viene del acta y la resuelve con una
+    sola consulta al diccionario.
+    """
+
+    def resolve(self, cc_raw, default=""):
+        if not cc_raw:
+            return default
+        return self.get(PATTERNS["non_digits"].sub("", str(cc_raw)), default)
+
+
+def cc_map_from_frame(df):
+    cols = std_cols(df.columns)
+    col_grado = next((i for i, c in enumerate(cols) if "GRADO" in c), None)
+    col_nombre = next((i for i, c in enumerate(cols) if "NOMBRES" in c or ("NOMBRE" in c and "APELL" in c)), None)
+    col_cc = next((i for i, c in enumerate(cols) if PATTERNS["cc_col"].search(c)), None)
+    if col_cc is None:
+        return CCMap()
+
+    def text_col(i):
+        if i is None:
+            return pd.Series("", index=df.index, dtype=object)
+        return df.iloc[:, i].map(lambda v: str(v or "").strip())
+
+    grado, name = text_col(col_grado), text_col(col_nombre)
+    cc_digits = df.iloc[:, col_cc].map(lambda v: str(v or "")).str.replace(PATTERNS["non_digits"], "", regex=True)
+
+    # "GRADO. NOMBRE" (sin punto suelto si falta el grado); si queda vacío, el nombre o la CC
+    display = (grado + ". " + name).str.strip().str.strip(". ")
+    display = display.where(display != "", name.where(name != "", cc_digits))
+
+    keep = cc_digits != ""
+    return CCMap(zip(cc_digits[keep].tolist(), display[keep].tolist()))
+
+
+def build_cc_map_from_inventory(inv_xlsx):
+    return open_inventory(inv_xlsx).cc_map
+
+
+def std_cols(cols):
+    return [PATTERNS["spaces"].sub(" ", str(c)).strip().upper() for c in cols]
+
+
+def header_key(cols):
+    """Encabezados normalizados como tupla: clave de las cachés de esquemas."""
+    return tuple(std_cols(cols))
+
+
+def col_idx(cols_std, target):
+    pat = target if isinstance(target, re.Pattern) else re.compile(target, re.IGNORECASE)
+    for i, col in enumerate(cols_std):
+        if pat.search(col):
+            return i
+    return None
+
+
+# --- Esquemas por hoja: añadimos OBSERVACIONES UNIDAD
+#     Memoizado por (hoja FUERA o no, encabezados): un formato ya visto se resuelve con una consulta.
+@lru_cache(maxsize=512)
+def _update_schema(fuera, headers):
+    schema_common = {role: col_idx(headers, pat) for role, pat in UPDATE_COLUMNS}
+    if fuera:
+        for role, pat in FUERA_COLUMNS:
+            schema_common[role] = schema_common[role] or col_idx(headers, pat)
+    return schema_common
+
+
+def get_update_schema(sheet_name, cols_std):
+    return dict(_update_schema("FUERA" in sheet_name.upper(), tuple(cols_std)))
+
+
+INDEX_SIDECAR = "idx"
+
+
+def serial_fingerprint(df, ser_col_name):
+    # Huella de una hoja para el índice: encabezados + columna de serie (sin normalizar)
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(b"\x1e")
+    h.update("\x1f".join(map(str, df[ser_col_name].tolist())).encode("utf-8"))
+    return h.hexdigest()
+
+
+# --- Prioridad de hojas cuando una serie aparece en más de una
+def sheet_priority(sheet_names, policy=DEFAULT_SHEET_PRIORITY):
+    """Devuelve las hojas en el orden en que se prefieren.
+
+    ``policy``: "workbook" (orden del libro), "fuera_last" (las hojas FUERA al final)
+    o una lista de nombres de hoja que van primero, en ese orden; el resto sigue en
+    orden del libro.
+    """
+    names = list(sheet_names)
+    if policy == "workbook":
+        return names
+    if policy == "fuera_last":
+        return [n for n in names if "FUERA" not in n.upper()] + [n for n in names if "FUERA" in n.upper()]
+    if isinstance(policy, (list, tuple)):
+        first = [n for n in policy if n in names]
+        return first + [n for n in names if n not in first]
+    raise ValueError(f"PRIORIDAD DE HOJAS NO ES CORRECTA: {policy!r}")
+
+
+# --- Índice único de series de todo el inventario
+# Valores de SERIE que significan "sin serie": no cuentan como series repetidas
+PLACEHOLDER_SERIALS = frozenset({"N/A", "NA", "S/N", "-"})
+
+
+def norm_inventory_number(x):
+    # Número de inventario (SAP / R6 SILOG) comparable: como la serie, y además sin el ".0"
+    # ni los ceros a la izquierda de una celda numérica; "N/A", "0" y vacíos no identifican un bien
+    if not isinstance(x, str) and pd.isna(x):
+        return ""
+    key = norm_serial(x)
+    if key.endswith(".0") and key[:-2].isdigit():
+        key = key[:-2]
+    if key.isdigit():
+        key = key.lstrip("0")
+    return "" if key in PLACEHOLDER_SERIALS else key
+
+
+class SerialIndex:
+    """serie normalizada -> [(hoja, filas)] en orden de prioridad de hojas.
+
+    Se arma en una sola pasada sobre los índices por hoja (que son los que se guardan
+    en caché). ``first`` es la ubicación que se actualiza: todas las filas de la hoja
+    de mayor prioridad que contiene la serie. Una consulta por ítem, sin importar
+    cuántas hojas tenga el inventario.
+    """
+
+    def __init__(self, per_sheet, order):
+        self.order = [name for name in order if name in per_sheet]
+        self.locations = {}
+        self.first = {}
+        for name in self.order:
+            for key, rows in per_sheet[name].items():
+                entry = (name, rows)
+                locs = self.locations.get(key)
+                if locs is None:
+                    self.locations[key] = [entry]
+                    self.first[key] = entry
+                else:
+                    locs.append(entry)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, key):
+        return key in self.locations
+
+    @cached_property
+    def duplicates(self):
+        """Series que aparecen en más de una fila (misma hoja o varias hojas), sin contar 'N/A' y similares."""
+        return {key: locs for key, locs in self.locations.items()
+                if (len(locs) > 1 or len(locs[0][1]) > 1) and key not in PLACEHOLDER_SERIALS}
+
+    def describe(self, key):
+        # "EQUIPOS fila 12, FUERA DE SERVICIO fila 4" (filas de Excel)
+        return ", ".join(f"{name} fila {row + 2}" for name, rows in self.locations.get(key, []) for row in rows)
+
+    def duplicate_rows(self):
+        """Filas del reporte de duplicados: serie, hoja, fila de Excel y si es la que se actualiza."""
+        for key, locs in self.duplicates.items():
+            for i, (name, rows) in enumerate(locs):
+                for row in rows:
+                    yield {"SERIE": key, "HOJA": name, "FILA": row + 2, "SE_ACTUALIZA": "SI" if i == 0 else "NO"}
+
+
+def write_duplicates_report(session, path):
+    """CSV (separado por ';', abre directo en Excel) con las series repetidas del inventario."""
+    index = session.global_index
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["SERIE", "HOJA", "FILA", "SE_ACTUALIZA"], delimiter=";")
+        writer.writeheader()
+        writer.writerows(index.duplicate_rows())
+    return len(index.duplicates)
+
+
+# --- Hojas del inventario que se parsean recién cuando se piden
+class LazySheets(Mapping):
+    """hoja -> DataFrame (dtype=str, 'N/A' literal), parseada la primera vez que se usa.
+
+    ``header(hoja)`` lee solo la fila de encabezados. Itera en el orden del libro.
+    Con ``snapshot`` (InventorySnapshot) las hojas se leen de la instantánea si está al
+    día y las que se parsean del .xlsx se guardan en ella; ``xl`` puede ser la ruta del
+    libro, que se abre recién si alguna hoja no está en la instantánea.
+    """
+
+    def __init__(self, xl, names, snapshot=None):
+        self._xl = xl
+        self._names = list(names)
+        self._snapshot = snapshot
+        self._frames = {}
+        self._headers = {}
+        self.from_snapshot = []
+
+    def _excel(self):
+        if not isinstance(self._xl, pd.ExcelFile):
+            self._xl = pd.ExcelFile(self._xl)
+        return self._xl
+
+    def __getitem__(self, name):
+        if name not in self._frames:
+            if name not in self._names:
+                raise KeyError(name)
+            df = self._snapshot.load(name) if self._snapshot is not None else None
+            if df is not None:
+                self.from_snapshot.append(name)
+            else:
+                df = self._excel().parse(name, dtype=str, keep_default_na=False)
+                if self._snapshot is not None:
+                    self._snapshot.store(name, df)
+            self._frames[name] = df
+        return self._frames[name]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def header(self, name):
+        if name in self._frames:
+            return list(self._frames[name].columns)
+        if name not in self._headers:
+            stored = self._snapshot.header(name) if self._snapshot is not None else None
+            self._headers[name] = stored or list(self._excel().parse(name, nrows=0, dtype=str).columns)
+        return self._headers[name]
+
+    def loaded(self):
+        """Hojas ya parseadas (en orden del libro)."""
+        return [name for name in self._names if name in self._frames]
+
+
+# --- Copias de trabajo: una hoja se copia de la sesión solo cuando el proceso la pide
+class WorkingSheets(MutableMapping):
+    """Hojas a modificar por el proceso, sin alterar la sesión (que puede reutilizarse).
+
+    ``ws[hoja]`` devuelve la copia de trabajo (la crea si hace falta). ``items()`` recorre
+    todas las hojas en orden del libro pero, para las no tocadas, entrega la hoja original
+    de la sesión sin copiarla: es para leer (guardar), no para modificar.
+
+    ``checkpoint()`` / ``rollback()`` deshacen lo que hizo un acta que falló a mitad de
+    camino: desde el checkpoint, cada hoja se copia la primera vez que se pide.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._frames = {}
+        self._saved = None       # hoja -> estado en el checkpoint (None: sin tocar)
+
+    def __getitem__(self, name):
+        self._remember(name)
+        if name not in self._frames:
+            self._frames[name] = self._session.sheets[name].copy()
+        return self._frames[name]
+
+    def __setitem__(self, name, df):
+        if name not in self._session.sheets:
+            raise KeyError(name)
+        self._remember(name)
+        self._frames[name] = df
+
+    def _remember(self, name):
+        if self._saved is not None and name not in self._saved:
+            frame = self._frames.get(name)
+            self._saved[name] = None if frame is None else frame.copy()
+
+    def checkpoint(self):
+        """Marca el estado actual; ``rollback()`` vuelve a él."""
+        self._saved = {}
+
+    def rollback(self):
+        """Descarta los cambios hechos desde el último checkpoint()."""
+        for name, frame in (self._saved or {}).items():
+            if frame is None:
+                self._frames.pop(name, None)
+            else:
+                self._frames[name] = frame
+        self._saved = None
+
+    def release(self):
+        """Conserva los cambios hechos desde el último checkpoint()."""
+        self._saved = None
+
+    def __delitem__(self, name):
+        raise TypeError("no se pueden quitar hojas del inventario")
+
+    def __iter__(self):
+        return iter(self._session.sheet_names)
+
+    def __len__(self):
+        return len(self._session.sheet_names)
+
+    def items(self):
+        for name in self:
+            yield name, self._frames[name] if name in self._frames else self._session.sheets[name]
+
+    def touched(self):
+        """Hojas copiadas o reemplazadas por el proceso (las únicas que pueden cambiar)."""
+        return [name for name in self if name in self._frames]
+
+
+# --- Inventario abierto una sola vez: hojas, mapa CC, esquemas e índice por serie
+#     se calculan una vez y se comparten entre validación, previsualización y proceso.
+#     Las hojas se parsean solo cuando hacen falta (ver LazySheets): los esquemas salen
+#     de los encabezados, y con la caché vigente el índice no necesita leer ninguna hoja.
+class InventorySession:
+    def __init__(self, path, use_cache=True, sheet_priority=DEFAULT_SHEET_PRIORITY):
+        self.path = path
+        self.sheet_priority = sheet_priority
+
+        # Sidecar en disco con índice por serie, esquemas y mapa CC de la última corrida:
+        #   "hit"     -> el .xlsx no cambió, se usa tal cual
+        #   "partial" -> cambió; solo se reindexan las hojas cuya columna de serie cambió
+        #   "miss"    -> no hay caché;  "off" -> caché desactivada
+        self.use_cache = use_cache and isinstance(path, (str, os.PathLike))
+        self.cache_state = "off"
+        self.reindexed_sheets = []
+        self._stored = None
+        self.source_key = None
+        if self.use_cache:
+            try:
+                stored = load_sidecar(path, INDEX_SIDECAR)
+                self.source_key = source_key(path, stored.get("source") if stored else None)
+            except OSError:
+                self.use_cache = False
+            else:
+                self._stored = stored
+                if not stored:
+                    self.cache_state = "miss"
+                elif stored.get("source", {}).get("sha256") == self.source_key["sha256"]:
+                    self.cache_state = "hit"
+                else:
+                    self.cache_state = "partial"
+
+        # Hojas manteniendo 'N/A', parseadas a demanda; con la instantánea al día el
+        # .xlsx no se abre (solo si falta alguna hoja en ella)
+        self.snapshot = InventorySnapshot(path, self.source_key) if self.use_cache else None
+        if self.snapshot is not None and self.snapshot.fresh:
+            self.sheet_names = list(self.snapshot.sheet_names)
+            self.sheets = LazySheets(path, self.sheet_names, self.snapshot)
+        else:
+            xl = pd.ExcelFile(path)
+            self.sheet_names = list(xl.sheet_names)
+            if self.snapshot is not None:
+                self.snapshot.sheet_names = self.sheet_names
+            self.sheets = LazySheets(xl, self.sheet_names, self.snapshot)
+
+    @property
+    def snapshot_state(self):
+        """"hit" (todas las hojas leídas de la instantánea), "partial", "miss" u "off"."""
+        if self.snapshot is None:
+            return "off"
+        loaded = self.sheets.loaded()
+        if loaded and len(self.sheets.from_snapshot) == len(loaded):
+            return "hit"
+        return "partial" if self.sheets.from_snapshot else "miss"
+
+    @cached_property
+    def cc_sheet_name(self):
+        return find_cc_sheet(self.sheet_names)
+
+    @cached_property
+    def sin_serial_name(self):
+        return find_sin_serial_sheet(self.sheet_names)
+
+    @cached_property
+    def cc_map(self):
+        if self.cache_state == "hit":
+            return CCMap(self._stored["cc_map"])
+        if not self.cc_sheet_name:
+            return CCMap()
+        return cc_map_from_frame(self.sheets[self.cc_sheet_name])
+
+    @cached_property
+    def schemas(self):
+        if self.cache_state == "hit":
+            return self._stored["schemas"]
+        return {name: get_update_schema(name, std_cols(self.sheets.header(name))) for name in self.sheet_names}
+
+    @cached_property
+    def serial_index(self):
+        if self.cache_state == "hit":
+            if self._stored["source"] != self.source_key:
+                self._save_cache(self._stored["sheets"])  # mismo contenido, nuevo mtime
+            return {name: entry["index"] for name, entry in self._stored["sheets"].items()}
+
+        previous = (self._stored or {}).get("sheets", {})
+        entries = {}
+        for name in self.sheet_names:
+            schema = self.schemas.get(name)
+            if not schema or schema["SERIE"] is None:
+                continue   # sin columna de serie: la hoja no se parsea
+            df = self.sheets[name]
+            ser_col_name = df.columns[schema["SERIE"]]
+            fingerprint = serial_fingerprint(df, ser_col_name) if self.use_cache else None
+            old = previous.get(name)
+            if old and old["fingerprint"] == fingerprint:
+                entries[name] = old
+                continue
+            ser_map = {}
+            for idx, v in df[ser_col_name].items():
+                key = norm_serial(v)
+                if key:
+                    ser_map.setdefault(key, []).append(idx)
+            entries[name] = {"fingerprint": fingerprint, "index": ser_map}
+            self.reindexed_sheets.append(name)
+
+        if self.use_cache:
+            self._save_cache(entries)
+        return {name: entry["index"] for name, entry in entries.items()}
+
+    @cached_property
+    def global_index(self):
+        return SerialIndex(self.serial_index, sheet_priority(self.sheet_names, self.sheet_priority))
+
+    @cached_property
+    def serial_lookup(self):
+        """serie normalizada -> (hoja, filas) en la hoja de mayor prioridad que la contiene."""
+        return self.global_index.first
+
+    @cached_property
+    def inventory_number_index(self):
+        """Índice por número de inventario normalizado (SerialIndex), de todas las hojas con esa columna.
+
+        Se arma la primera vez que un ítem no se encuentra por serie; no va a la caché
+        (las hojas salen de la instantánea).
+        """
+        per_sheet = {}
+        for name in self.sheet_names:
+            schema = self.schemas.get(name)
+            if not schema or schema.get("INV") is None:
+                continue
+            df = self.sheets[name]
+            inv_map = {}
+            for idx, v in df[df.columns[schema["INV"]]].items():
+                key = norm_inventory_number(v)
+                if key:
+                    inv_map.setdefault(key, []).append(idx)
+            per_sheet[name] = inv_map
+        return SerialIndex(per_sheet, sheet_priority(self.sheet_names, self.sheet_priority))
+
+    @cached_property
+    def fuzzy_index(self):
+        """Índice de trigramas para buscar series parecidas; se arma la primera vez que hace falta."""
+        return FuzzySerialIndex(key for key in self.global_index.locations if key not in PLACEHOLDER_SERIALS)
+
+    def _save_cache(self, entries):
+        save_sidecar(self.path, INDEX_SIDECAR, {
+            "source": self.source_key,
+            "schemas": self.schemas,
+            "cc_map": dict(self.cc_map),
+            "sheets": entries,
+        })
+
+    def working_sheets(self):
+        """Copias de trabajo (WorkingSheets) para modificar sin alterar la sesión."""
+        return WorkingSheets(self)
+
+    @property
+    def cell_count(self):
+        # Peso aproximado en memoria (para el desalojo de INVENTORY_CACHE): solo hojas ya parseadas
+        return sum(self.sheets[name].size for name in self.sheets.loaded())
+
+
+# --- Actas e inventarios abiertos en esta ejecución, por (ruta, mtime, tamaño):
+#     previsualizar -> procesar y las corridas repetidas no vuelven a leer ni a indexar.
+#     Las sesiones no se modifican al procesar (se trabaja sobre WorkingSheets).
+ACTA_CACHE = FileCache(max_entries=32, max_weight=5_000_000, weigh=lambda doc: doc.cell_count)
+INVENTORY_CACHE = FileCache(max_entries=2, max_weight=20_000_000, weigh=lambda session: session.cell_count)
+
+
+def open_inventory(inv, use_cache=True, sheet_priority=DEFAULT_SHEET_PRIORITY):
+    """Acepta una ruta o una InventorySession ya abierta y devuelve la sesión.
+
+    Una ruta ya abierta con las mismas opciones (y sin cambios en disco) devuelve la
+    misma sesión, con su mapa CC, esquemas e índices ya armados (INVENTORY_CACHE).
+    """
+    if isinstance(inv, InventorySession):
+        return inv
+    priority = tuple(sheet_priority) if isinstance(sheet_priority, (list, tuple)) else sheet_priority
+    return INVENTORY_CACHE.get(inv, (use_cache, priority),
+                               lambda: InventorySession(inv, use_cache=use_cache, sheet_priority=sheet_priority))
+
+
+# --- Lee la tabla de la ACTA y corta en el marcador de fin
+def read_acta_items(acta, start_row=DEFAULT_START_ROW):
+    return open_acta(acta).items(start_row)
+
+
+class ProcessCancelled(Exception):
+    """El proceso se detuvo a pedido del usuario entre dos etapas (no se guardó nada)."""
+
+
+# --- Tiempos por etapa y contadores de una corrida
+class RunStats:
+    """Duración de cada etapa y contadores (filas leídas, índice, aciertos, bytes escritos).
+
+    ``as_dict()`` es lo que devuelven process_inventory / process_batch y lo que se
+    guarda como informe JSON junto al Excel generado.
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        self._current = None
+        self.total_seconds = None
+        self.stages = []
+        self.counters = {}
+
+    def begin(self, label):
+        now = time.perf_counter()
+        self._close(now)
+        self._current = (label, now)
+
+    def end(self):
+        now = time.perf_counter()
+        self._close(now)
+        self.total_seconds = round(now - self._t0, 4)
+
+    def _close(self, now):
+        if self._current:
+            label, t = self._current
+            self.stages.append({"stage": label, "seconds": round(now - t, 4)})
+            self._current = None
+
+    def add(self, key, n=1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def set(self, key, value):
+        self.counters[key] = value
+
+    def as_dict(self):
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_seconds": self.total_seconds,
+            "stages": list(self.stages),
+            "counters": dict(self.counters),
+        }
+
+    def log_text(self):
+        lines = ["Tiempos por etapa:"]
+        lines += [f"  {s['stage']}: {s['seconds']:.3f} s" for s in self.stages]
+        if self.total_seconds is not None:
+            lines.append(f"  Total: {self.total_seconds:.3f} s")
+        lines.append("Contadores:")
+        for key, value in self.counters.items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}={v}" for k, v in value.items())
+            lines.append(f"  {key}: {value}")
+        return "\n".join(lines) + "\n"
+
+
+def write_run_report(report, out_path):
+    """Guarda ``report`` como JSON junto al Excel generado (mismo nombre, extensión .json)."""
+    report_path = os.path.splitext(out_path)[0] + ".json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    return report_path
+
+
+class StageProgress:
+    """Cuenta etapas y las reporta a ``progress(hechas, total, etiqueta)``.
+
+    ``progress`` puede lanzar ProcessCancelled para detener el proceso entre etapas.
+    Cada etapa se cronometra en ``stats`` (RunStats).
+    """
+
+    def __init__(self, progress, total):
+        self.progress = progress
+        self.total = total
+        self.done = 0
+        self.stats = RunStats()
+
+    def __call__(self, label):
+        self.stats.begin(label)
+        self.tick(label)
+
+    def tick(self, label):
+        # Avance sin abrir una etapa nueva en los tiempos
+        if self.progress:
+            self.progress(self.done, self.total, label)
+        self.done += 1
+
+    def finish(self, label="Listo"):
+        self.stats.end()
+        self.done = self.total
+        if self.progress:
+            self.progress(self.total, self.total, label)
+
+
+def count_inventory(stats, session):
+    """Filas leídas por hoja del inventario (solo las que se llegaron a parsear)."""
+    stats.set("rows_per_sheet", {name: len(session.sheets[name]) for name in session.sheets.loaded()})
+    stats.set("sheets_not_parsed", len(session.sheet_names) - len(session.sheets.loaded()))
+    stats.set("snapshot", session.snapshot_state)
+
+
+@lru_cache(maxsize=512)
+def _match_col(headers, patterns):
+    for i, clean in enumerate(headers):
+        for pat in patterns:
+            if pat.search(clean):
+                return i
+    return None
+
+
+def find_col(df, patterns):
+    patterns = tuple(p if isinstance(p, re.Pattern) else re.compile(p) for p in patterns)
+    i = _match_col(header_key(df.columns), patterns)
+    return None if i is None else df.columns[i]
+
+
+# --- Columnas de ítems por rol, memoizado por encabezados (actas de la misma plantilla)
+@lru_cache(maxsize=512)
+def resolve_item_columns(headers):
+    return tuple(_match_col(headers, patterns) for _, patterns in ITEM_COLUMNS)
+
+
+APPLY_STAGES = 5
+
+
+def find_similar_serials(session, keys, threshold=DEFAULT_FUZZY_THRESHOLD):
+    """Series del acta que no están en el inventario -> [FuzzyMatch] sobre el umbral (las sin candidatas no aparecen)."""
+    lookup = session.serial_lookup
+    similar = {}
+    for key in dict.fromkeys(keys):
+        if key and key not in lookup:
+            matches = session.fuzzy_index.candidates(key, threshold)
+            if matches:
+                similar[key] = matches
+    return similar
+
+
+def match_inventory_numbers(session, items_work):
+    """Ítems sin serie (o 'N/A') o con serie no encontrada -> (hoja, [fila]) por número de inventario.
+
+    Solo cuenta un número que identifica una única fila del inventario. Devuelve
+    (coincidencias por índice del ítem, números repetidos en el inventario).
+    """
+    lookup = session.serial_lookup
+    keys = items_work["SERIE_N"]
+    inv_keys = items_work["INV"].map(norm_inventory_number)
+    pending = inv_keys[(inv_keys != "") & keys.map(lambda key: key in PLACEHOLDER_SERIALS or key not in lookup)]
+    if pending.empty:
+        return {}, []
+    index = session.inventory_number_index
+    matches, repeated = {}, []
+    for i, key in pending.items():
+        locs = index.locations.get(key)
+        if not locs:
+            continue
+        if len(locs) == 1 and len(locs[0][1]) == 1:
+            matches[i] = locs[0]
+        elif key not in repeated:
+            repeated.append(key)
+    return matches, repeated
+
+
+def item_matches(items_work, start_row, serial_lookup, aliases, inv_matches, added_sheet=None, added_from=0):
+    """Cómo se ubicó cada ítem del acta, en el orden del acta.
+
+    ``origen``: "serie", "serie_parecida" (fuzzy apply), "numero_inventario", o bien
+    "sin_serie" / "no_encontrado" (van a ``added_sheet`` a partir de la fila ``added_from``).
+    ``hoja`` y ``filas`` (filas de Excel) dicen dónde quedó; ``fila_acta`` es la fila del ítem en el acta.
+    """
+    matches = []
+    new_row = added_from
+    for i, r in zip(items_work.index, items_work.to_dict("records")):
+        key = r["SERIE_N"]
+        target = aliases.get(key, key)
+        loc = inv_matches.get(i)
+        if loc is not None:
+            origen = "numero_inventario"
+        elif target and target in serial_lookup:
+            loc = serial_lookup[target]
+            origen = "serie" if target == key else "serie_parecida"
+        else:
+            origen = "no_encontrado" if key else "sin_serie"
+            if added_sheet:
+                loc = (added_sheet, [new_row])
+                new_row += 1
+        matches.append({
+            "fila_acta": start_row + 1 + int(i),
+            "serie": norm_str(r["SERIE"]) or None,
+            "inventario": norm_str(r["INV"]) or None,
+            "origen": origen,
+            "hoja": loc[0] if loc else None,
+            "filas": [int(row) + 2 for row in loc[1]] if loc else [],
+        })
+    return matches
+
+
+def _write_column(df, name, rows, col, values, changes):
+    # Escribe ``values`` (escalar o lista) en la columna ``col`` de ``rows``; con ``changes``
+    # (lista) registra además un CellChange por celda que cambia de valor
+    column = df.columns[col]
+    if changes is not None:
+        last = dict(zip(rows, values if isinstance(values, list) else [values] * len(rows)))
+        old = df.loc[list(last), column].tolist()
+        changes.extend(CellChange(name, r, col, column, o, n) for (r, n), o in zip(last.items(), old)
+                       if o != n and not (pd.isna(o) and pd.isna(n)))
+    df.loc[rows, column] = values
+
+
+def apply_serial_updates(inv_sheets, schemas, serial_lookup, items_work, meta, responsable_display, aliases=None,
+                         changes=None, inv_matches=None):
+    """Cruza los ítems del acta (por SERIE_N) contra el índice del inventario y escribe
+    RESP / UBIC / ACTA / FECHA / OBS_UNIT por columnas completas, hoja por hoja.
+
+    Cada serie se aplica en la hoja de mayor prioridad que la contiene (``serial_lookup``
+    = SerialIndex.first). ``aliases`` (serie del acta -> serie del inventario) aplica las
+    series parecidas aceptadas como si fueran la del inventario. ``inv_matches`` (índice
+    del ítem -> (hoja, filas), ver match_inventory_numbers) ubica esos ítems por número de
+    inventario en lugar de por serie. ``changes`` (lista), si se indica, recibe un
+    CellChange por cada celda modificada.
+    Devuelve (ítems actualizados, [(tipo, fila del ítem)]) con tipo NO_SERIE o NOT_FOUND,
+    en el orden del acta.
+    """
+    keys = items_work["SERIE_N"]
+    if aliases:
+        keys = keys.map(lambda key: aliases.get(key, key))
+    obs = items_work["OBS"].map(norm_str)   # conservar "N/A" como texto
+    hits = keys.map(serial_lookup.get)   # .get: map() con un dict lo convierte entero en Series
+    found = hits.notna() & (keys != "")
+    if inv_matches:
+        by_inv = pd.Series(items_work.index.isin(list(inv_matches)), index=items_work.index)
+        hits = hits.where(~by_inv, items_work.index.to_series().map(inv_matches))
+        found |= by_inv
+
+    # Una fila del inventario por cada (ítem, fila encontrada)
+    found_hits = hits[found].tolist()
+    matched = pd.DataFrame({
+        "SHEET": [h[0] for h in found_hits],
+        "ROW": [h[1] for h in found_hits],
+        "OBS": obs[found].tolist(),
+    }, columns=["SHEET", "ROW", "OBS"]).explode("ROW")
+
+    for name, group in matched.groupby("SHEET", sort=False):
+        df = inv_sheets[name]
+        schema = schemas[name]
+        rows = group["ROW"].tolist()
+        if schema["RESP"] is not None:
+            _write_column(df, name, rows, schema["RESP"], responsable_display, changes)
+        if schema["UBIC"] is not None and meta["location_code"]:
+            _write_column(df, name, rows, schema["UBIC"], meta["location_code"], changes)
+        if schema["ACTA"] is not None:
+            _write_column(df, name, rows, schema["ACTA"], meta["acta_text"], changes)
+        if schema["FECHA"] is not None and meta["date_str"]:
+            _write_column(df, name, rows, schema["FECHA"], meta["date_str"], changes)
+        if schema["OBS_UNIT"] is not None:
+            # solo ítems con observación; si una fila se repite en el acta gana la última
+            with_obs = group[group["OBS"] != ""].drop_duplicates("ROW", keep="last")
+            if len(with_obs):
+                _write_column(df, name, with_obs["ROW"].tolist(), schema["OBS_UNIT"], with_obs["OBS"].tolist(),
+                              changes)
+
+    kinds = pd.Series("NOT_FOUND", index=items_work.index)
+    kinds[keys == ""] = "NO_SERIE"
+    missing = items_work[~found]
+    missing_rows = list(zip(kinds[~found].tolist(), missing.to_dict("records")))
+    return int(found.sum()), missing_rows
+
+
+def apply_acta(session, inv_sheets, acta, start_row, location_mode, acta_mode, log, stage=None, stats=None,
+               fuzzy_mode=DEFAULT_FUZZY_MODE, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, journal=None, matches=None):
+    """Aplica un acta sobre las hojas de trabajo ``inv_sheets`` (en memoria, sin guardar).
+
+    ``stage(etiqueta)``, si se indica, se llama al inicio de cada una de las APPLY_STAGES etapas.
+    ``stats`` (RunStats), si se indica, acumula ítems leídos, aciertos y faltantes.
+    ``fuzzy_mode`` ("off" | "suggest" | "apply") decide qué hacer con las series que no
+    aparecen tal cual pero se parecen a una del inventario (confianza >= ``fuzzy_threshold``).
+    ``journal`` (Journal), si se indica, omite el acta si ya fue aplicada y si no la registra
+    con sus cambios. ``matches`` (lista), si se indica, recibe por cada ítem cómo se ubicó
+    (ver item_matches).
+    Devuelve (meta, responsable, actualizados por serie, agregados a SIN SERIAL).
+    """
+    stage = stage or (lambda label: None)
+    stats = stats or RunStats()
+
+    stage("Leyendo metadatos del acta")
+    log("Leyendo metadatos del acta...\n")
+    acta = open_acta(acta)
+    meta = acta.meta(location_mode, acta_mode)
+
+    log(f"Fecha: {meta.get('date_str')}\n")
+    log(f"ACTA: {meta.get('acta_text')}\n")
+    log(f"Ubicación: {meta.get('location_code')}\n")
+    log(f"FUNCIONARIO QUE RECIBE — CC: {meta.get('recipient_cc')} | Nombre: {meta.get('recipient_name')}\n")
+
+    stage("Construyendo mapa CC")
+    log("Construyendo mapa CC -> 'GRADO. NOMBRE APELLIDO'...\n")
+    # --- Responsable display: "GRADO. NOMBRE" resuelto por CC en Hoja CC;
+    #     si no hubo match en Hoja CC, "SIN RESPONSABLE"
+    responsable_display = session.cc_map.resolve(meta.get("recipient_cc")) or "SIN RESPONSABLE"
+
+    if journal is not None:
+        previous = journal.lookup(acta.content_hash, meta.get("acta_text"), meta.get("date_str"))
+        if previous:
+            log(f"{meta.get('acta_text') or 'El acta'} ya fue aplicada ({previous['acta']}, {previous['at']}); "
+                f"se omite.\n")
+            stats.add("actas_skipped")
+            return meta, responsable_display, 0, 0
+
+    stage("Leyendo ítems del acta")
+    log("Leyendo ítems del acta...\n")
+    items_df = acta.items(start_row)
+
+    # --- Columnas del acta (ITEM_COLUMNS), incluyendo OBSERVACIONES
+    positions = resolve_item_columns(header_key(items_df.columns))
+
+    # Conservar literales incluyendo "N/A"
+    use_cols = [None if i is None else items_df.columns[i] for i in positions]
+    items_work = items_df[use_cols].copy()
+    items_work.columns = [role for role, _ in ITEM_COLUMNS]
+    items_work["SERIE_N"] = items_work["SERIE"].map(norm_serial)
+
+    schemas = session.schemas
+
+    stage("Indexando inventario")
+    in_memory = "serial_index" in vars(session)    # sesión reutilizada: índice ya armado
+    if in_memory:
+        log("Índice por número de serie ya en memoria (inventario sin cambios).\n")
+    elif session.cache_state == "hit":
+        log("Índice por número de serie recuperado de caché (inventario sin cambios).\n")
+    else:
+        log("Indexando inventario por número de serie...\n")
+    session.serial_index
+    if session.cache_state == "partial" and not in_memory:
+        log(f"Hojas reindexadas: {', '.join(session.reindexed_sheets) or 'ninguna'}\n")
+    # En un lote cuenta la primera acta (las siguientes siempre lo encuentran en memoria)
+    stats.counters.setdefault("index_cache", "memory" if in_memory else session.cache_state)
+    stats.set("index_sheets", len(session.serial_index))
+    stats.set("index_serials", len(session.global_index))
+    stats.set("duplicate_serials", len(session.global_index.duplicates))
+
+    stage("Aplicando actualizaciones")
+    # --- Sin serie o serie no encontrada: ubicar el bien por número de inventario (SAP / R6 SILOG)
+    inv_matches, inv_repeated = match_inventory_numbers(session, items_work)
+    for i, (name, rows) in inv_matches.items():
+        log(f"Ítem {norm_str(items_work.at[i, 'SERIE']) or 'sin serie'}: ubicado por número de inventario "
+            f"{norm_str(items_work.at[i, 'INV'])} ({name} fila {rows[0] + 2})\n")
+    for key in inv_repeated:
+        log(f"Número de inventario {key} repetido en el inventario "
+            f"({session.inventory_number_index.describe(key)}); no se usa para ubicar el ítem\n")
+
+    # --- Series no encontradas: buscar parecidas (O/0, I/1, guiones, caracteres invertidos)
+    similar, aliases = {}, {}
+    if fuzzy_mode != "off":
+        t0 = time.perf_counter()
+        log("Buscando series parecidas para las no encontradas...\n")
+        similar = find_similar_serials(session, items_work["SERIE_N"].drop(list(inv_matches)), fuzzy_threshold)
+        for key, matches in similar.items():
+            best = matches[0]
+            unique = len(matches) == 1 or matches[1].confidence < best.confidence
+            if fuzzy_mode == "apply" and unique:
+                aliases[key] = best.serial
+                log(f"Serie {key} no encontrada; se aplicó a {best.serial} ({best.confidence:.0%}, "
+                    f"{session.global_index.describe(best.serial)})\n")
+            else:
+                log(f"Serie {key} no encontrada; parecidas: "
+                    f"{', '.join(f'{m.serial} ({m.confidence:.0%})' for m in matches)}\n")
+        stats.add("fuzzy_applied", len(aliases))
+        stats.add("fuzzy_suggested", len(similar) - len(aliases))
+        stats.add("fuzzy_seconds", round(time.perf_counter() - t0, 4))
+
+    log("Aplicando actualizaciones...\n")
+    cell_changes = [] if journal is not None else None
+    updated_hits, missing_serial_or_not_found = apply_serial_updates(
+        inv_sheets, schemas, session.serial_lookup, items_work, meta, responsable_display, aliases, cell_changes,
+        inv_matches
+    )
+    no_serial = sum(1 for kind, _ in missing_serial_or_not_found if kind == "NO_SERIE")
+
+    # Series del acta repetidas en el inventario: se avisa dónde están y dónde se aplicó
+    duplicates = session.global_index.duplicates
+    ambiguous = [key for key in dict.fromkeys(aliases.get(k, k) for k in items_work["SERIE_N"]) if key in duplicates]
+    for key in ambiguous:
+        log(f"Serie {key} repetida en el inventario ({session.global_index.describe(key)}); "
+            f"se actualizó en {session.serial_lookup[key][0]}\n")
+    stats.add("ambiguous_hits", len(ambiguous))
+    stats.add("acta_items", len(items_work))
+    stats.add("hits", updated_hits)
+    stats.add("hits_serial", updated_hits - len(inv_matches))
+    stats.add("hits_inventory_number", len(inv_matches))
+    stats.add("inventory_number_repeated", len(inv_repeated))
+    stats.add("not_found", len(missing_serial_or_not_found) - no_serial)
+    stats.add("no_serial", no_serial)
+
+    # --- Hoja SIN SERIAL: agregar y llevar observaciones a "OBSERVACIONES UNIDAD"
+    sin_serial_name = session.sin_serial_name
+    if sin_serial_name:
+        ss_df = inv_sheets[sin_serial_name]
+        req_cols = [
+            'No',
+            'DESCRIPCIÓN DEL ACTIVO Ó BIEN',
+            'DESCRIPCIÓN ADICIONAL - ACCESORIOS',
+            'NÚMERO DE SERIE DEL BIEN / O LOTE PARA EL CASO DE MUNICIÓN',
+            'NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)',
+            'VALOR DE ADQUISICIÓN',
+            'CANTIDAD',
+            'OBSERVACIONES UNIDAD',
+            'OBSERVACION INTERNA',
+            'UBICACIÓN', 
+            'No ACTA',
+            'FECHA',
+            'RESPONSABLE'
+        ]
+        for col in req_cols:
+            if col not in ss_df.columns:
+                ss_df[col] = pd.Series([None] * len(ss_df))
+
+        def parse_no(x):
+            try:
+                return int(str(x).strip())
+            except Exception:
+                return None
+
+        next_no = 1
+        if len(ss_df):
+            nums = [parse_no(v) for v in ss_df['No'].tolist()]
+            if any(n is not None for n in nums):
+                next_no = max(n for n in nums if n is not None) + 1
+
+        append_rows = []
+        for kind, r in missing_serial_or_not_found:
+            note = "SIN SERIE" if kind == "NO_SERIE" else "SERIE NO ENCONTRADA"
+            if r["SERIE_N"] in similar:
+                note += "; parecida: " + ", ".join(f"{m.serial} {m.confidence:.0%}" for m in similar[r["SERIE_N"]])
+            desc = norm_str(r["DESC"])      # conserva "N/A"
+            desc2 = norm_str(r["DESC2"])    # conserva "N/A"
+            serie = norm_str(r["SERIE"])    # conserva "N/A"
+            invn  = norm_str(r["INV"])      # conserva "N/A"
+            valor = norm_str(r["VALOR"])    # conserva "N/A"
+            cant  = norm_str(r["CANTIDAD"])
+            obs   = norm_str(r["OBS"]) or None
+            append_rows.append({
+                'No': next_no,
+                'DESCRIPCIÓN DEL ACTIVO Ó BIEN': desc,
+                'DESCRIPCIÓN ADICIONAL - ACCESORIOS': desc2,
+                'NÚMERO DE SERIE DEL BIEN / O LOTE PARA EL CASO DE MUNICIÓN': serie,
+                'NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)': invn,
+                'VALOR DE ADQUISICIÓN': valor,
+                'CANTIDAD': cant,
+                'OBSERVACIONES UNIDAD': obs,  # <<<<<< observaciones del acta (incluye "N/A" literal)
+                'OBSERVACION INTERNA': f"Auto-registro ({note})",
+                'UBICACIÓN': meta["location_code"],
+                'No ACTA': meta["acta_text"],
+                'FECHA': meta["date_str"],
+                'RESPONSABLE': responsable_display,
+            })
+            next_no += 1
+
+        if append_rows:
+            inv_sheets[sin_serial_name] = pd.concat([ss_df, pd.DataFrame(append_rows)], ignore_index=True)
+
+    items = item_matches(items_work, start_row, session.serial_lookup, aliases, inv_matches,
+                         sin_serial_name, len(ss_df) if sin_serial_name else 0)
+    if matches is not None:
+        matches.extend(items)
+
+    if journal is not None:
+        appended = {}
+        if sin_serial_name and append_rows:
+            appended[sin_serial_name] = inv_sheets[sin_serial_name].iloc[len(ss_df):]
+        journal.record(acta.content_hash, meta.get("acta_text"), acta.path,
+                       ChangeSet(cell_changes, appended, items).as_dict(), meta.get("date_str"))
+
+    return meta, responsable_display, updated_hits, len(missing_serial_or_not_found)
+
+
+# --- Cambios del proceso respecto del inventario original
+UPDATE_ROLES = ("RESP", "UBIC", "ACTA", "FECHA", "OBS_UNIT")
+
+# fila / col: posición 0-based en el DataFrame (fila 0 = fila 2 de Excel); column: nombre
+CellChange = namedtuple("CellChange", "sheet row col column old new")
+
+
+def inventory_changes(session, inv_sheets):
+    """Compara ``inv_sheets`` con las hojas originales de la sesión.
+
+    Solo mira las columnas que el proceso actualiza (RESP, UBIC, ACTA, FECHA, OBS_UNIT)
+    en las hojas que tocó, tengan o no columna de serie (los ítems ubicados por número de
+    inventario pueden caer en SIN SERIAL), y las filas agregadas al final de cada hoja.
+    Devuelve ([CellChange], {hoja: DataFrame con las filas agregadas}).
+    """
+    cells, appended = [], {}
+    names = inv_sheets.touched() if isinstance(inv_sheets, WorkingSheets) else list(inv_sheets)
+    for name in names:
+        after, before = inv_sheets[name], session.sheets[name]
+        schema = session.schemas.get(name) or {}
+        positions = sorted({schema[role] for role in UPDATE_ROLES if schema.get(role) is not None})
+        if positions and len(before):
+            old = before.iloc[:, positions].to_numpy(dtype=object)
+            new = after.iloc[:len(before), positions].to_numpy(dtype=object)
+            changed = (old != new) & ~(pd.isna(old) & pd.isna(new))
+            for r, c in zip(*changed.nonzero()):
+                col = positions[c]
+                cells.append(CellChange(name, int(r), col, before.columns[col], old[r, c], new[r, c]))
+        if len(after) > len(before):
+            appended[name] = after.iloc[len(before):]
+    return cells, appended
+
+
+def _plain(v):
+    # Valor exportable (CSV / JSON): vacío -> None, escalares NumPy -> Python
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+class ChangeSet:
+    """Lo que un proceso cambiaría en el inventario: celdas (CellChange) y filas agregadas por hoja.
+
+    Las filas se informan como filas de Excel (fila 0 del DataFrame = fila 2). ``items``
+    (ver item_matches), si se conoce, dice cómo se ubicó cada ítem del acta; con eso cada
+    celda y fila agregada lleva su ``origen``.
+    """
+
+    def __init__(self, cells, appended, items=None):
+        self.cells = cells
+        self.appended = appended
+        self.items = items or []
+
+    def origins(self):
+        # (hoja, fila de Excel) -> origen del ítem que la escribió (gana el último)
+        return {(m["hoja"], row): m["origen"] for m in self.items for row in m["filas"]}
+
+    @property
+    def rows_appended(self):
+        return sum(len(df) for df in self.appended.values())
+
+    def since(self, earlier):
+        """Cambios respecto de ``earlier`` (ChangeSet anterior de las mismas hojas de trabajo)."""
+        previous = {(c.sheet, c.row, c.col): c for c in earlier.cells}
+        current = {(c.sheet, c.row, c.col): c for c in self.cells}
+        cells = []
+        for key, c in current.items():
+            before = previous.get(key)
+            if before is None:
+                cells.append(c)
+            elif before.new != c.new:
+                cells.append(c._replace(old=before.new))
+        # Celdas que vuelven a su valor original
+        cells += [c._replace(old=c.new, new=c.old) for key, c in previous.items() if key not in current]
+        order = {name: i for i, name in enumerate(dict.fromkeys(c.sheet for c in earlier.cells + self.cells))}
+        cells.sort(key=lambda c: (order[c.sheet], c.row, c.col))
+        appended = {name: df.iloc[len(earlier.appended.get(name, ())):] for name, df in self.appended.items()}
+        return ChangeSet(cells, {name: df for name, df in appended.items() if len(df)}, self.items)
+
+    def _appended_rows(self):
+        for name, df in self.appended.items():
+            for row, values in zip(df.index, df.itertuples(index=False)):
+                yield name, int(row) + 2, {col: _plain(v) for col, v in zip(df.columns, values)
+                                           if _plain(v) not in (None, "")}
+
+    def as_dict(self):
+        origins = self.origins()
+        return {
+            "cells": [{"sheet": c.sheet, "row": c.row + 2, "column": c.column,
+                       "old": _plain(c.old), "new": _plain(c.new),
+                       "origen": origins.get((c.sheet, c.row + 2))} for c in self.cells],
+            "appended": [{"sheet": name, "row": row, "values": values, "origen": origins.get((name, row))}
+                         for name, row, values in self._appended_rows()],
+            "items": list(self.items),
+        }
+
+    def records(self):
+        """Filas planas (CSV): una por celda cambiada y una por celda con valor de cada fila agregada."""
+        origins = self.origins()
+        for c in self.cells:
+            yield {"TIPO": "CAMBIO", "HOJA": c.sheet, "FILA": c.row + 2, "COLUMNA": c.column,
+                   "ANTES": _plain(c.old), "DESPUES": _plain(c.new), "ORIGEN": origins.get((c.sheet, c.row + 2))}
+        for name, row, values in self._appended_rows():
+            for col, v in values.items():
+                yield {"TIPO": "NUEVA", "HOJA": name, "FILA": row, "COLUMNA": col, "ANTES": None, "DESPUES": v,
+                       "ORIGEN": origins.get((name, row))}
+
+
+def write_change_set(changes, path):
+    """Exporta un ChangeSet a ``path``: .json (celdas + filas agregadas) o .csv (separado por ';')."""
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(changes.as_dict(), f, ensure_ascii=False, indent=2, default=str)
+    elif path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["TIPO", "HOJA", "FILA", "COLUMNA", "ANTES", "DESPUES", "ORIGEN"],
+                                    delimiter=";")
+            writer.writeheader()
+            writer.writerows(changes.records())
+    else:
+        raise ValueError("ARCHIVO DE CAMBIOS NO ES CORRECTO (use .csv o .json)")
+    return path
+
+
+class PatchUnsupported(Exception):
+    """El libro original no se puede parchar celda a celda (se reescribe completo)."""
+
+
+def _header_matches(ws, df):
+    # pandas toma la fila 1 como encabezado: "Unnamed: N" si está vacía, "X.1" si se repite
+    for j, col in enumerate(map(str, df.columns), start=1):
+        v = ws.cell(row=1, column=j).value
+        if v is None or not str(v).strip():
+            if not col.startswith("Unnamed:"):
+                return False
+        elif str(v) != col and not col.startswith(f"{v}."):
+            return False
+    return True
+
+
+def write_patched(session, inv_sheets, out_path):
+    """Abre el libro original una sola vez, escribe solo las celdas que cambiaron y
+    las filas agregadas (SIN SERIAL), y guarda en ``out_path``.
+
+    Se conservan anchos de columna, estilos, filtros y fórmulas del inventario.
+    Devuelve (celdas modificadas, filas agregadas).
+    """
+    if not isinstance(session.path, (str, os.PathLike)):
+        raise PatchUnsupported("el inventario no viene de un archivo")
+    cells, appended = inventory_changes(session, inv_sheets)
+
+    wb = load_workbook(session.path)
+    for name in {c.sheet for c in cells} | set(appended):
+        if not _header_matches(wb[name], session.sheets[name]):
+            raise PatchUnsupported(f"la hoja '{name}' no coincide con lo leído")
+
+    for c in cells:
+        wb[c.sheet].cell(row=c.row + 2, column=c.col + 1, value=c.new)
+
+    added = 0
+    for name, rows in appended.items():
+        ws = wb[name]
+        before = session.sheets[name]
+        for j in range(len(before.columns), len(rows.columns)):   # columnas nuevas (p. ej. UBICACIÓN)
+            ws.cell(row=1, column=j + 1, value=rows.columns[j])
+        first = len(before) + 2
+        for i, values in enumerate(rows.itertuples(index=False, name=None)):
+            for j, v in enumerate(values):
+                if v is not None and not pd.isna(v):
+                    ws.cell(row=first + i, column=j + 1, value=v)
+        added += len(rows)
+
+    wb.save(out_path)
+    return len(cells), added
+
+
+def _stream_rows(df):
+    # NaN -> celda vacía, igual que DataFrame.to_excel
+    for values in df.itertuples(index=False, name=None):
+        yield [None if v is None or (not isinstance(v, str) and pd.isna(v)) else v for v in values]
+
+
+def write_streaming(inv_sheets, out_path):
+    """Escribe las hojas fila por fila sin armar el modelo de celdas completo en memoria.
+
+    Usa xlsxwriter (``constant_memory``) si está instalado; si no, openpyxl en modo
+    write-only. Mismos nombres de hoja, orden de columnas y encabezado en negrita que
+    la reescritura con pandas. Devuelve el nombre del motor usado.
+    """
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(out_path, {"constant_memory": True, "strings_to_urls": False})
+        header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        for name, df in inv_sheets.items():
+            ws = wb.add_worksheet(name)
+            ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+            for r, values in enumerate(_stream_rows(df), start=1):
+                ws.write_row(r, 0, values)
+        wb.close()
+        return "xlsxwriter"
+
+    wb = Workbook(write_only=True)
+    thin = Side(style="thin")
+    for name, df in inv_sheets.items():
+        ws = wb.create_sheet(title=name)
+        header = []
+        for c in df.columns:
+            cell = WriteOnlyCell(ws, value=str(c))
+            cell.font = Font(bold=True)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.alignment = Alignment(horizontal="center", vertical="top")
+            header.append(cell)
+        ws.append(header)
+        for values in _stream_rows(df):
+            ws.append(values)
+    wb.save(out_path)
+    return "openpyxl write-only"
+
+
+def save_inventory(session, inv_sheets, log, output_mode=DEFAULT_OUTPUT_MODE, stats=None):
+    # --- Guardar con el formato "14NOV25 - 10_35"
+    stamp = format_stamp(datetime.now())
+    base = os.path.splitext(os.path.basename(session.path))[0]
+    out_name = f"{base} {stamp}.xlsx"
+    out_path = os.path.join(os.path.dirname(session.path), out_name)
+
+    log(f"Guardando archivo: {out_path}\n")
+    written = None
+    if output_mode == "patch":
+        try:
+            n_cells, n_rows = write_patched(session, inv_sheets, out_path)
+            log(f"Celdas modificadas: {n_cells} | Filas agregadas: {n_rows}\n")
+            written = "patch"
+            if stats is not None:
+                stats.set("cells_changed", n_cells)
+                stats.set("rows_appended", n_rows)
+        except PatchUnsupported as e:
+            log(f"No se puede conservar el formato ({e}); se reescribe el libro completo.\n")
+    elif output_mode == "stream":
+        engine = write_streaming(inv_sheets, out_path)
+        log(f"Escritura por flujo ({engine}).\n")
+        written = f"stream ({engine})"
+
+    if written is None:
+        with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
+            for name, df in inv_sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+        written = "rewrite"
+
+    if stats is not None:
+        stats.set("output_mode", written)
+        stats.set("bytes_written", os.path.getsize(out_path))
+    return out_path
+
+
+def _finish_report(stages, log, report, **fields):
+    # Cierra los tiempos, los lleva al log y arma el dict (y el JSON si se pidió)
+    stages.finish()
+    log("\n" + stages.stats.log_text())
+    result = dict(fields, **stages.stats.as_dict())
+    if report and result.get("output"):
+        result["report"] = write_run_report(result, result["output"])
+        log(f"Informe de la corrida: {result['report']}\n")
+    return result
+
+
+def load_journal(session, inv_sheets, log, stats, read_only=False):
+    """Abre la bitácora de actas del inventario y repite sobre ``inv_sheets`` las actas
+    registradas que el archivo todavía no contiene. Devuelve el Journal, o None si el
+    inventario no viene de un archivo o la bitácora no se pudo leer.
+    """
+    if not isinstance(session.path, (str, os.PathLike)):
+        return None
+    try:
+        journal = Journal(session.path, log, base_key=source_key(session.path, session.source_key),
+                          read_only=read_only)
+    except (OSError, KeyError, TypeError) as e:
+        log(f"No se pudo leer la bitácora de actas ({e}); se procesa sin ella.\n")
+        return None
+    replayed = journal.replay(inv_sheets)
+    if replayed:
+        log(f"Bitácora: se repitieron {replayed} acta(s) ya registradas sobre el inventario.\n")
+    stats.set("journal_actas", len(journal))
+    stats.set("journal_replayed", replayed)
+    return journal
+
+
+def process_inventory(inv_path, acta_path, start_row, location_mode, acta_mode, log, progress=None,
+                      output_mode=DEFAULT_OUTPUT_MODE, report=False, fuzzy_mode=DEFAULT_FUZZY_MODE,
+                      fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, use_journal=True):
+    """Aplica un acta y guarda el inventario actualizado.
+
+    Con ``use_journal`` el acta se registra en la bitácora junto al inventario una vez
+    guardado el archivo (o se omite si ya estaba) y las actas registradas antes se repiten
+    sobre el inventario base.
+    Devuelve (ruta generada, meta, responsable, actualizados, agregados, estadísticas).
+    Las estadísticas (tiempos por etapa y contadores) también van al log y, con
+    ``report``, a un JSON junto al Excel generado.
+    """
+    stages = StageProgress(progress, total=APPLY_STAGES + 2)
+    stats = stages.stats
+
+    stages("Cargando inventario")
+    log("Cargando inventario...\n")
+    session = open_inventory(inv_path)
+    inv_sheets = session.working_sheets()
+    journal = load_journal(session, inv_sheets, log, stats) if use_journal else None
+
+    items = []
+    meta, responsable_display, updated_hits, added = apply_acta(
+        session, inv_sheets, acta_path, start_row, location_mode, acta_mode, log, stage=stages, stats=stats,
+        fuzzy_mode=fuzzy_mode, fuzzy_threshold=fuzzy_threshold, journal=journal, matches=items
+    )
+
+    stages("Guardando archivo")
+    out_path = save_inventory(session, inv_sheets, log, output_mode, stats=stats)
+    if journal is not None:
+        journal.record_output(out_path)
+    count_inventory(stats, session)
+    acta_name = acta_path.path if isinstance(acta_path, ActaDocument) else acta_path
+    run_stats = _finish_report(stages, log, report, inventory=session.path, actas=[acta_name], output=out_path,
+                               items=[dict(m, acta=acta_name) for m in items])
+    return out_path, meta, responsable_display, updated_hits, added, run_stats
+
+
+def dry_run_inventory(inv_path, acta_path, start_row, location_mode, acta_mode, log, progress=None,
+                      fuzzy_mode=DEFAULT_FUZZY_MODE, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, changes_path=None,
+                      use_journal=True):
+    """Aplica un acta solo en memoria y devuelve lo que cambiaría, sin escribir ningún Excel.
+
+    Devuelve (ChangeSet, meta, responsable, actualizados, agregados, estadísticas). Con
+    ``changes_path`` (.csv o .json) exporta además el detalle de los cambios. Con
+    ``use_journal`` se parte del estado según la bitácora (que no se modifica).
+    """
+    stages = StageProgress(progress, total=APPLY_STAGES + 2)
+    stats = stages.stats
+
+    stages("Cargando inventario")
+    log("Cargando inventario...\n")
+    session = open_inventory(inv_path)
+    inv_sheets = session.working_sheets()
+    journal = load_journal(session, inv_sheets, log, stats, read_only=True) if use_journal else None
+    # Con actas repetidas desde la bitácora, la simulación muestra solo lo que agrega esta acta
+    replayed = ChangeSet(*inventory_changes(session, inv_sheets)) if stats.counters.get("journal_replayed") else None
+
+    items = []
+    meta, responsable_display, updated_hits, added = apply_acta(
+        session, inv_sheets, acta_path, start_row, location_mode, acta_mode, log, stage=stages, stats=stats,
+        fuzzy_mode=fuzzy_mode, fuzzy_threshold=fuzzy_threshold, journal=journal, matches=items
+    )
+
+    stages("Calculando cambios")
+    changes = ChangeSet(*inventory_changes(session, inv_sheets), items)
+    if replayed is not None:
+        changes = changes.since(replayed)
+    log(f"Simulación: cambiarían {len(changes.cells)} celdas y se agregarían {changes.rows_appended} filas "
+        f"(no se escribió ningún Excel).\n")
+    stats.set("cells_changed", len(changes.cells))
+    stats.set("rows_appended", changes.rows_appended)
+    if changes_path:
+        write_change_set(changes, changes_path)
+        log(f"Detalle de cambios: {changes_path}\n")
+    count_inventory(stats, session)
+    acta_name = acta_path.path if isinstance(acta_path, ActaDocument) else acta_path
+    run_stats = _finish_report(stages, log, False, inventory=session.path, actas=[acta_name], output=None,
+                               dry_run=True, items=[dict(m, acta=acta_name) for m in items])
+    return changes, meta, responsable_display, updated_hits, added, run_stats
+
+
+def _inventory_root(path):
+    # "inv 14NOV25 - 10_35 15NOV25 - 09_00.xlsx" -> "INV": nombre del inventario sin marcas de salida
+    return PATTERNS["output_stamps"].sub("", os.path.splitext(os.path.basename(path))[0]).upper()
+
+
+def list_actas(actas, inventory=None):
+    """Acepta una carpeta (toma sus .xlsx) o una lista de rutas / ActaDocument.
+
+    Con ``inventory`` (ruta), de la carpeta se omiten el inventario y los archivos que el
+    proceso generó a partir de él ("<inventario> 14NOV25 - 10_35.xlsx"), que se guardan
+    junto al inventario y pueden compartir carpeta con las actas.
+    """
+    if isinstance(actas, (str, os.PathLike)):
+        if not os.path.isdir(actas):
+            return [actas]
+        names = sorted(n for n in os.listdir(actas) if n.lower().endswith(".xlsx") and not n.startswith("~$"))
+        if isinstance(inventory, (str, os.PathLike)):
+            root = _inventory_root(inventory)
+            names = [n for n in names if _inventory_root(n) != root]
+        return [os.path.join(actas, n) for n in names]
+    return list(actas)
+
+
+def _prepare_acta(acta, start_row, location_mode, acta_mode):
+    # Se ejecuta en un proceso del pool: valida y parsea el acta completa
+    try:
+        return validate_acta(acta).preload(start_row, location_mode, acta_mode), None
+    except Exception as e:
+        return None, str(e)
+
+
+def prepare_actas(actas, start_row, location_mode, acta_mode, workers=None, on_ready=None):
+    """Valida y parsea varias actas en paralelo (un proceso por núcleo).
+
+    Devuelve [(ruta, ActaDocument o None, error o None)] en el mismo orden de ``actas``,
+    sin importar el orden en que terminen los procesos. ``on_ready(ruta)`` se llama al
+    terminar cada una. Con ``workers`` <= 1 (o una sola acta) todo corre en este proceso.
+    """
+    paths = [a.path if isinstance(a, ActaDocument) else a for a in actas]
+    # Las ya abiertas en esta ejecución (p. ej. previsualizadas) no se vuelven a leer
+    actas = [a if isinstance(a, ActaDocument) else ACTA_CACHE.peek(a) or a for a in actas]
+    results = [None] * len(actas)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def done(i, result):
+        results[i] = (paths[i],) + result
+        if on_ready:
+            on_ready(paths[i])
+
+    # Las actas ya abiertas no se envían al pool (su libro no viaja entre procesos)
+    remote = {i for i, a in enumerate(actas) if not isinstance(a, ActaDocument)}
+    if workers <= 1 or len(remote) <= 1:
+        remote = set()
+    for i, acta in enumerate(actas):
+        if i not in remote:
+            done(i, _prepare_acta(acta, start_row, location_mode, acta_mode))
+
+    if remote:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(remote)))
+        try:
+            futures = {pool.submit(_prepare_acta, actas[i], start_row, location_mode, acta_mode): i
+                       for i in remote}
+            for fut in as_completed(futures):
+                done(futures[fut], fut.result())
+        finally:
+            # Si se cancela (on_ready lanza), no esperar a las actas pendientes
+            pool.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def process_batch(inv_path, actas, start_row, location_mode, acta_mode, log, progress=None, workers=None,
+                  output_mode=DEFAULT_OUTPUT_MODE, report=False, fuzzy_mode=DEFAULT_FUZZY_MODE,
+                  fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, use_journal=True):
+    """Aplica varias actas, en orden de fecha del acta, sobre un solo inventario en memoria
+    y guarda un único archivo de salida.
+
+    Las actas se validan y parsean en paralelo (``workers`` procesos; por defecto uno
+    por núcleo) y se aplican en orden, una a una, en este proceso. Con ``use_journal``
+    se omiten las ya registradas en la bitácora (ver process_inventory).
+    Devuelve (ruta generada o None si no se aplicó ninguna, resumen por acta, estadísticas).
+    """
+    actas = list_actas(actas, inv_path.path if isinstance(inv_path, InventorySession) else inv_path)
+    # cargar + validar cada acta + aplicar cada acta + guardar
+    stages = StageProgress(progress, total=2 * len(actas) + 2)
+    stats = stages.stats
+
+    stages("Cargando inventario")
+    log("Cargando inventario...\n")
+    session = open_inventory(inv_path)
+    inv_sheets = session.working_sheets()
+    journal = load_journal(session, inv_sheets, log, stats) if use_journal else None
+
+    log("Validando y leyendo actas...\n")
+    stats.begin("Validando y leyendo actas")
+    docs, rejected = [], []
+    prepared = prepare_actas(actas, start_row, location_mode, acta_mode, workers,
+                             on_ready=lambda path: stages.tick(f"Validando {os.path.basename(path)}"))
+    for path, doc, error in prepared:
+        if doc is None:
+            log(f"Omitida {os.path.basename(path)}: {error}\n")
+            rejected.append({"acta": path, "error": error})
+        else:
+            docs.append(doc)
+
+    # Orden cronológico por la fecha de fila 8; a igual fecha, por nombre de archivo
+    docs.sort(key=lambda d: (d.row8_date, os.path.basename(d.path)))
+
+    summary = []
+    for doc in docs:
+        stages(f"Aplicando {os.path.basename(doc.path)}")
+        log(f"\n--- {os.path.basename(doc.path)} ---\n")
+        skipped = stats.counters.get("actas_skipped", 0)
+        inv_sheets.checkpoint()
+        items = []
+        try:
+            meta, resp, updated, added = apply_acta(
+                session, inv_sheets, doc, start_row, location_mode, acta_mode, log, stats=stats,
+                fuzzy_mode=fuzzy_mode, fuzzy_threshold=fuzzy_threshold, journal=journal, matches=items
+            )
+        except ProcessCancelled:
+            raise
+        except Exception as e:
+            # Lo que el acta alcanzó a escribir no va al archivo
+            inv_sheets.rollback()
+            log(f"Error aplicando {os.path.basename(doc.path)}: {e}; se descartaron sus cambios.\n")
+            summary.append({"acta": doc.path, "error": str(e)})
+            continue
+        inv_sheets.release()
+        summary.append({
+            "acta": doc.path,
+            "acta_text": meta.get("acta_text"),
+            "date_str": meta.get("date_str"),
+            "responsable": resp,
+            "updated": updated,
+            "added": added,
+            "items": items,
+        })
+        if stats.counters.get("actas_skipped", 0) > skipped:
+            summary[-1]["skipped"] = True     # ya estaba en la bitácora
+
+    out_path = None
+    if any("error" not in item for item in summary):
+        stages.done = stages.total - 1
+        stages("Guardando archivo")
+        out_path = save_inventory(session, inv_sheets, log, output_mode, stats=stats)
+        if journal is not None:
+            journal.record_output(out_path)
+    count_inventory(stats, session)
+    stats.set("actas_applied", sum(1 for item in summary if "error" not in item and not item.get("skipped")))
+    stats.set("actas_rejected", len(rejected) + sum(1 for item in summary if "error" in item))
+    run_stats = _finish_report(stages, log, report, inventory=session.path, actas=[doc.path for doc in docs],
+                               output=out_path,
+                               items=[dict(m, acta=item["acta"]) for item in summary for m in item.get("items", ())])
+    return out_path, summary + rejected, run_stats
+
+
+def validate_inventory(inv_path, use_cache=True, sheet_priority=DEFAULT_SHEET_PRIORITY):
+    """Valida el formato del inventario y devuelve la InventorySession para reutilizarla."""
+    try:
+        session = open_inventory(inv_path, use_cache=use_cache, sheet_priority=sheet_priority)
+    except Exception:
+        raise ValueError("FORMATO DE INVENTARIO NO ES CORRECTO")
+
+    # Debe existir hoja CC y SIN SERIAL
+    has_cc = any(PATTERNS["cc_word"].search(name) for name in session.sheet_names)
+    sin_serial_name = session.sin_serial_name
+
+    if not has_cc or not sin_serial_name:
+        raise ValueError("FORMATO DE INVENTARIO NO ES CORRECTO")
+
+    # Columnas mínimas en SIN SERIAL (basta con los encabezados)
+    header = session.sheets.header(sin_serial_name)
+    cols = dict(zip(std_cols(header), header))
+    required = [
+        "NO",
+        "DESCRIPCIÓN DEL ACTIVO Ó BIEN",
+        "DESCRIPCIÓN ADICIONAL - ACCESORIOS",
+        "NÚMERO DE SERIE DEL BIEN / O LOTE PARA EL CASO DE MUNICIÓN",
+        "NÚMERO INVENTARIO (CÓDIGO SAP/R6 SILOG)",
+        "VALOR DE ADQUISICIÓN",
+        "CANTIDAD",
+        "OBSERVACION INTERNA",   # existe
+        # "UBICACIÓN" la vamos a crear si falta
+        "NO ACTA",
+        "FECHA",
+        "RESPONSABLE",
+    ]
+    ok = all(r in cols for r in required)
+    if not ok:
+        # seguimos permitiendo porque podemos crear las que falten,
+        # pero si faltan muchas, lo consideramos inválido
+        missing = [r for r in required if r not in cols]
+        if len(missing) > 5:
+            raise ValueError("FORMATO DE INVENTARIO NO ES CORRECTO")
+
+    return session
+
+
+def validate_acta(acta_path):
+    """Valida el formato del acta y devuelve el ActaDocument para reutilizarlo en el proceso."""
+    try:
+        acta = open_acta(acta_path)
+    except Exception:
+        raise ValueError("FORMATO ACTA DE ASGINACION NO ES CORRECTO")
+
+    # Fecha en fila 8
+    if not acta.row8_date:
+        raise ValueError("FORMATO ACTA DE ASGINACION NO ES CORRECTO")
+
+    # Responsable (al menos encontrar la cédula en tabla/entorno)
+    cc, _, _ = acta.responsable
+    if not cc:
+        raise ValueError("FORMATO ACTA DE ASGINACION NO ES CORRECTO")
+
+    # Marcador de fin de listado
+    if not acta.end_marker_row:
+        raise ValueError("FORMATO ACTA DE ASGINACION NO ES CORRECTO")
+
+    return acta
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — series parecidas
+---------------------------------------------
+Búsqueda aproximada de números de serie para los ítems del acta que no aparecen
+tal cual en el inventario: errores de digitación como O/0, I/1, guiones o puntos
+de más o de menos, dos caracteres vecinos invertidos o un carácter cambiado.
+
+El índice es de trigramas (índice invertido guardado en arreglos NumPy). Cada
+consulta suma las listas de sus trigramas y solo compara en detalle los mejores
+candidatos; nunca recorre todas las series del inventario.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+# Confusiones típicas al transcribir: se comparan como el mismo carácter / se ignoran
+_FOLD = str.maketrans({"O": "0", "I": "1", "-": None, ".": None, "/": None, "_": None})
+
+FuzzyMatch = namedtuple("FuzzyMatch", "serial confidence")
+
+
+def fold_serial(key):
+    """Serie normalizada (norm_serial) sin separadores y con O->0, I->1."""
+    return key.translate(_FOLD)
+
+
+def edit_distance(a, b, limit):
+    """Distancia de edición con transposición de vecinos (OSA), acotada a la banda ``limit``.
+
+    Si la distancia supera ``limit`` devuelve limit + 1 sin terminar de calcularla.
+    """
+    la, lb = len(a), len(b)
+    big = limit + 1
+    if abs(la - lb) > limit:
+        return big
+    prev2 = None
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [big] * (lb + 1)
+        cur[0] = i
+        lo, hi = max(1, i - limit), min(lb, i + limit)
+        ca = a[i - 1]
+        for j in range(lo, hi + 1):
+            cb = b[j - 1]
+            v = prev[j - 1] + (ca != cb)
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and prev2[j - 2] + 1 < v:
+                v = prev2[j - 2] + 1
+            cur[j] = v
+        if min(cur[lo - 1:hi + 1]) > limit:
+            return big
+        prev2, prev = prev, cur
+    return min(prev[lb], big)
+
+
+def _gram_codes(chars):
+    # chars: matriz (n, ancho) de puntos de código; un int64 por trigrama (21 bits por carácter)
+    return (chars[:, :-2] << 42) | (chars[:, 1:-1] << 21) | chars[:, 2:]
+
+
+def _char_matrix(texts, width):
+    return np.array(texts, dtype=f"<U{width}").view(np.uint32).reshape(len(texts), width).astype(np.int64)
+
+
+class FuzzySerialIndex:
+    """Índice de trigramas sobre las series del inventario.
+
+    ``candidates(serie)`` devuelve [FuzzyMatch] ordenados de mayor a menor confianza
+    (1 - ediciones / largo). Una diferencia que solo es de O/0, I/1 o separadores
+    cuenta como media edición. Las series de menos de ``min_length`` caracteres no se
+    indexan ni se buscan: en series tan cortas casi todo "se parece".
+    """
+
+    def __init__(self, keys, min_length=4, shortlist=32):
+        self.min_length = min_length
+        self.shortlist = shortlist
+        # Varias series pueden quedar iguales al plegarlas (SN-01 / SN01): una forma para todas
+        self.by_form = {}
+        for key in keys:
+            form = fold_serial(key)
+            if len(form) >= min_length:
+                self.by_form.setdefault(form, []).append(key)
+        self.forms = list(self.by_form)
+        self._lengths = np.fromiter(map(len, self.forms), dtype=np.int32, count=len(self.forms))
+        if not self.forms:
+            self._grams = np.empty(0, dtype=np.int64)
+            self._bounds = np.zeros(1, dtype=np.int64)
+            self._postings = np.empty(0, dtype=np.int32)
+            return
+
+        padded = [f"^{form}$" for form in self.forms]
+        chars = _char_matrix(padded, max(map(len, padded)))
+        codes = _gram_codes(chars)
+        valid = chars[:, 2:] != 0   # trigramas que caen en el relleno del final
+        form_ids = np.broadcast_to(np.arange(len(self.forms))[:, None], codes.shape)[valid]
+        codes = codes[valid]
+
+        # Pares (trigrama, forma) sin repetir, ordenados por trigrama: listas contiguas
+        order = np.lexsort((form_ids, codes))
+        codes, form_ids = codes[order], form_ids[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (form_ids[1:] != form_ids[:-1])
+        codes, form_ids = codes[keep], form_ids[keep]
+        self._grams, starts = np.unique(codes, return_index=True)
+        self._bounds = np.append(starts, len(codes))
+        self._postings = form_ids.astype(np.int32)
+
+    def __len__(self):
+        return len(self.forms)
+
+    def candidates(self, key, threshold=DEFAULT_FUZZY_THRESHOLD, limit=3):
+        form = fold_serial(key)
+        if len(form) < self.min_length or not self.forms:
+            return []
+        padded = f"^{form}$"
+        codes = np.unique(_gram_codes(_char_matrix([padded], len(padded)))[0])
+        pos = np.minimum(np.searchsorted(self._grams, codes), len(self._grams) - 1)
+        pos = pos[self._grams[pos] == codes]
+        if not len(pos):
+            return []
+
+        counts = np.bincount(np.concatenate([self._postings[self._bounds[p]:self._bounds[p + 1]] for p in pos]),
+                             minlength=len(self.forms))
+        # Filtro por largo: con confianza >= umbral el largo no puede diferir más que esto
+        n = len(form)
+        counts[(self._lengths < threshold * n) | (self._lengths > n / threshold)] = 0
+
+        found = []
+        for i in self._shortlist(counts):
+            other = self.forms[i]
+            longest = max(n, len(other))
+            max_edits = int((1 - threshold) * longest + 1e-9)
+            dist = edit_distance(form, other, max_edits)
+            confidence = 1 - (dist or 0.5) / longest
+            if dist <= max_edits and confidence >= threshold:
+                found += [FuzzyMatch(serial, round(confidence, 3)) for serial in self.by_form[other] if serial != key]
+        found.sort(key=lambda m: (-m.confidence, m.serial))
+        return found[:limit]
+
+    def _shortlist(self, counts):
+        # Las ``shortlist`` formas con más trigramas en común. Los conteos son chicos
+        # (a lo sumo el largo de la serie): el corte sale del histograma, sin ordenar.
+        hist = np.bincount(counts)
+        hist[0] = 0
+        above = np.cumsum(hist[::-1])[::-1]     # formas con conteo >= c
+        cut = max(int(np.searchsorted(-above, -self.shortlist, side="right")) - 1, 1)
+        top = np.flatnonzero(counts > cut)
+        ties = np.flatnonzero(counts == cut)[:self.shortlist - len(top)]
+        return np.concatenate([top, ties]).tolist()
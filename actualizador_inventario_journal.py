@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — bitácora de actas
+----------------------------------------------
+Registro de solo-agregado (JSON Lines) de las actas aplicadas sobre un inventario,
+guardado junto a él: "inventario.xlsx" -> "inventario.bitacora.jsonl". Cada acta
+queda con la huella de su archivo (SHA-256), su número (acta_text) y las celdas y
+filas que cambió.
+
+- Un acta ya registrada (mismo archivo, o mismo número y fecha de acta) no se vuelve
+  a aplicar: sus ítems no cuentan dos veces ni se repiten filas en SIN SERIAL.
+- Un acta se escribe en la bitácora recién cuando se guardó el libro que la contiene:
+  si el guardado falla o se cancela, no queda registrada.
+- El estado actual del inventario es el archivo base más los cambios registrados:
+  se rearma repitiendo esos cambios, sin volver a leer ni procesar las actas.
+
+Las líneas "base" y "output" anotan la huella de un libro y cuántas actas de la
+bitácora ya contiene. Cada archivo generado recibe una copia de la bitácora (que
+termina en su línea "output"), así que al seguir trabajando sobre él las actas
+anteriores cuentan como aplicadas y no se repiten.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from actualizador_inventario_cache import source_key
+
+
+JOURNAL_SUFFIX = ".bitacora.jsonl"
+JOURNAL_VERSION = 1
+
+
+def journal_path(inv_path):
+    return os.path.splitext(inv_path)[0] + JOURNAL_SUFFIX
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _acta_key(acta_text, date_str):
+    # "ACTA No. 240" / "240" + fecha -> "240|2025-11-10"; sin número detectado ("ACTA") no hay
+    # clave: dos actas distintas sin número no deben tomarse por la misma
+    words = str(acta_text or "").upper().replace("NO.", "NO ").split()
+    while words and words[0] in ("ACTA", "NO", "N°", "NRO", "NRO."):
+        words.pop(0)
+    number = " ".join(words)
+    return f"{number}|{date_str or ''}" if number else None
+
+
+class Journal:
+    """Bitácora de las actas aplicadas sobre ``inv_path``.
+
+    ``lookup()`` dice en O(1) si un acta ya fue aplicada; ``replay()`` lleva a las hojas
+    de trabajo los cambios registrados que el archivo todavía no contiene. ``record()``
+    guarda el acta en memoria y ``record_output()``, después de guardar el libro, la
+    escribe al final junto con la línea "output". Con ``read_only`` (simulación) no se
+    escribe nada en disco.
+    """
+
+    def __init__(self, inv_path, log, base_key=None, read_only=False):
+        self.path = journal_path(inv_path)
+        self.log = log
+        self.read_only = read_only
+        self.by_hash = {}
+        self.by_text = {}
+        self.total = 0            # actas registradas
+        self.pending = []         # actas registradas que el inventario no contiene todavía
+        self.unsaved = []         # actas aplicadas en esta corrida, a escribir con record_output()
+
+        key = base_key or source_key(inv_path)
+        name = os.path.basename(inv_path)
+        actas, snapshots = [], []
+        for record in self._read():
+            if record.get("type") == "acta":
+                actas.append(record)
+                self._remember(record)
+            elif record.get("type") in ("base", "output"):
+                snapshots.append(record)
+        self.total = len(actas)
+
+        match = next((s for s in reversed(snapshots) if s.get("sha256") == key["sha256"]), None)
+        if match is None:
+            # Archivo nuevo o editado a mano: se repite lo que faltaba en su última versión conocida
+            same_file = next((s for s in reversed(snapshots) if s.get("file") == name), None)
+            included = same_file["actas"] if same_file else 0
+            if len(actas) > included:
+                self.log(f"Aviso: el inventario cambió desde la última acta registrada en la bitácora; "
+                         f"se repiten sobre él {len(actas) - included} acta(s).\n")
+            self._append({"type": "base", "version": JOURNAL_VERSION, "file": name, "sha256": key["sha256"],
+                          "size": key["size"], "actas": included, "at": _now()})
+        else:
+            included = match["actas"]
+        self.pending = actas[included:]
+
+    def __len__(self):
+        return self.total
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # línea cortada por un corte de luz a mitad de escritura
+            if isinstance(record, dict):
+                yield record
+
+    def _append(self, *records):
+        if self.read_only:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # Se sigue en memoria: el proceso no se interrumpe por la bitácora
+            self.log(f"No se pudo escribir la bitácora {self.path} ({e}); se continúa sin registrar.\n")
+            self.read_only = True
+
+    def _remember(self, record):
+        self.by_hash[record["sha256"]] = record
+        key = _acta_key(record.get("acta_text"), record.get("date_str"))
+        if key:
+            self.by_text[key] = record
+
+    def lookup(self, sha256, acta_text=None, date_str=None):
+        """Registro del acta si ya fue aplicada (mismo archivo, o mismo número y fecha), o None."""
+        return self.by_hash.get(sha256) or self.by_text.get(_acta_key(acta_text, date_str))
+
+    def record(self, sha256, acta_text, acta_path, changes, date_str=None):
+        """Registra un acta recién aplicada con sus cambios (ChangeSet.as_dict()).
+
+        Queda en memoria (``lookup()`` ya la encuentra) hasta que ``record_output()`` la
+        escribe: si el libro no se llega a guardar, la bitácora en disco no cambia.
+        """
+        record = {"type": "acta", "sha256": sha256, "acta_text": acta_text, "date_str": date_str,
+                  "acta": os.path.basename(acta_path), "at": _now(), "changes": changes}
+        self.unsaved.append(record)
+        self._remember(record)
+
+    def replay(self, inv_sheets):
+        """Aplica sobre ``inv_sheets`` los cambios de las actas que el inventario no contiene.
+
+        Las celdas se escriben por columna y las filas nuevas se agregan de una vez por
+        hoja; devuelve la cantidad de actas repetidas.
+        """
+        cells = {}       # (hoja, columna) -> {fila: valor}; gana la última acta
+        appended = {}    # hoja -> [valores por fila], en orden de registro
+        for record in self.pending:
+            changes = record["changes"]
+            for c in changes["cells"]:
+                cells.setdefault((c["sheet"], c["column"]), {})[c["row"] - 2] = c["new"]
+            for a in changes["appended"]:
+                appended.setdefault(a["sheet"], []).append(a["values"])
+        for (name, column), values in cells.items():
+            df = inv_sheets[name]
+            df.loc[list(values), column] = list(values.values())
+        for name, rows in appended.items():
+            inv_sheets[name] = pd.concat([inv_sheets[name], pd.DataFrame(rows)], ignore_index=True)
+        replayed, self.pending = len(self.pending), []
+        return replayed
+
+    def record_output(self, out_path):
+        """Escribe las actas de esta corrida, anota que ``out_path`` (ya guardado) las contiene
+        y le deja su copia de la bitácora."""
+        if self.read_only:
+            return
+        actas, self.unsaved = self.unsaved, []
+        self.total += len(actas)
+        key = source_key(out_path)
+        self._append(*actas, {"type": "output", "file": os.path.basename(out_path), "sha256": key["sha256"],
+                              "size": key["size"], "actas": self.total, "at": _now()})
+        try:
+            shutil.copyfile(self.path, journal_path(out_path))
+        except OSError as e:
+            self.log(f"No se pudo copiar la bitácora junto a {out_path} ({e}).\n")
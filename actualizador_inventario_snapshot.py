@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — instantánea columnar
+-------------------------------------------------
+Copia binaria, columna por columna, de las hojas del inventario ya parseadas (texto
+tal cual, con 'N/A' literal), guardada en la carpeta de caché junto a los demás
+sidecars. Leer el .xlsx es lo más lento de cada corrida; mientras el archivo no
+cambie (misma huella: tamaño, mtime y SHA-256) las hojas se leen de la instantánea
+y el libro ni siquiera se abre.
+
+Formato: Feather (Arrow) si pyarrow está instalado; si no, .npz de NumPy sin pickle:
+cada columna es un bloque UTF-8 con los valores separados por "\\x00" (carácter que
+no puede aparecer en un .xlsx) y una máscara para las celdas vacías (NaN).
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:  # opcional: Feather (Arrow) en lugar de .npz
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+from actualizador_inventario_cache import load_sidecar, save_sidecar, sidecar_path
+
+
+SNAPSHOT_SIDECAR = "snap"
+_SEP = "\x00"
+
+
+def snapshot_format():
+    return "feather" if feather is not None else "npz"
+
+
+def _column(values, mask):
+    # Mismo resultado que parse(dtype=str, keep_default_na=False): texto, NaN donde no hay valor
+    col = pd.Series(values, dtype=str)
+    return col.mask(mask) if mask is not None else col
+
+
+def _frame(columns, data):
+    df = pd.DataFrame({j: col for j, col in enumerate(data)}, index=pd.RangeIndex(len(data[0]) if data else 0))
+    df.columns = columns
+    return df
+
+
+def _write_npz(f, df, meta):
+    arrays = {}
+    for j, col in enumerate(df.columns):
+        values = df[col]
+        mask = values.isna().to_numpy()
+        if mask.any():
+            arrays[f"n{j}"] = mask
+            values = values.where(~mask, "")
+        text = _SEP.join(values.tolist())
+        if text.count(_SEP) != max(len(values) - 1, 0):
+            raise ValueError("celda con separador")   # no se puede guardar como bloque
+        arrays[f"c{j}"] = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+    np.savez(f, **arrays)
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(z["meta"].tobytes())
+        data = []
+        for j in range(len(meta["columns"])):
+            values = z[f"c{j}"].tobytes().decode("utf-8").split(_SEP) if meta["rows"] else []
+            data.append(_column(values, z[f"n{j}"] if f"n{j}" in z.files else None))
+    return meta, data
+
+
+def _write_feather(f, df, meta):
+    table = pa.table({str(j): pa.array(df[col].tolist(), type=pa.string(), from_pandas=True)
+                      for j, col in enumerate(df.columns)})
+    feather.write_feather(table.replace_schema_metadata({"snapshot": json.dumps(meta)}), f,
+                          compression="uncompressed")
+
+
+def _read_feather(path):
+    table = feather.read_table(path)
+    meta = json.loads(table.schema.metadata[b"snapshot"])
+    data = []
+    for j in range(len(meta["columns"])):
+        values = table.column(str(j)).to_numpy(zero_copy_only=False)
+        mask = pd.isna(values)
+        data.append(_column(np.where(mask, "", values), mask if mask.any() else None))
+    return meta, data
+
+
+class InventorySnapshot:
+    """Instantánea de las hojas de un inventario con huella ``source`` (ver source_key).
+
+    Si corresponde al archivo (``fresh``), ``sheet_names`` y ``header()`` salen del
+    manifiesto; si no, quien abre el libro asigna ``sheet_names``. ``load(hoja)`` devuelve
+    el DataFrame o None; ``store(hoja, df)`` la guarda para la próxima corrida. Cualquier
+    error se ignora, como en la caché.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.format = snapshot_format()
+        manifest = load_sidecar(path, SNAPSHOT_SIDECAR)
+        self.fresh = bool(manifest and manifest.get("source", {}).get("sha256") == source["sha256"]
+                          and manifest.get("format") == self.format)
+        if self.fresh:
+            self.sheet_names = manifest["sheets"]
+            self.headers = manifest["headers"]
+        else:
+            self.sheet_names = None
+            self.headers = {}
+
+    def __contains__(self, name):
+        return name in self.headers
+
+    def header(self, name):
+        return self.headers.get(name)
+
+    def _file(self, name):
+        return sidecar_path(self.path, f"{SNAPSHOT_SIDECAR}{self.sheet_names.index(name)}.{self.format}")
+
+    def load(self, name):
+        if name not in self.headers:
+            return None
+        try:
+            meta, data = (_read_feather if self.format == "feather" else _read_npz)(self._file(name))
+            if meta["sha256"] != self.source["sha256"] or meta["sheet"] != name:
+                return None
+            return _frame(meta["columns"], data)
+        except Exception:
+            return None
+
+    def store(self, name, df):
+        """Guarda una hoja recién parseada del .xlsx; devuelve False si no se pudo."""
+        columns = list(df.columns)
+        meta = {"sha256": self.source["sha256"], "sheet": name, "columns": columns, "rows": len(df)}
+        try:
+            json.dumps(columns)   # encabezados no textuales (p. ej. fechas): la hoja no se guarda
+            target = self._file(name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    (_write_feather if self.format == "feather" else _write_npz)(f, df, meta)
+                os.replace(tmp, target)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (OSError, TypeError, ValueError):
+            return False
+        self.headers[name] = columns
+        return save_sidecar(self.path, SNAPSHOT_SIDECAR, {
+            "source": self.source,
+            "format": self.format,
+            "sheets": list(self.sheet_names),
+            "headers": self.headers,
+        })
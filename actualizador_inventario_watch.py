@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Actualizador de Inventario — bandeja de entrada
+-----------------------------------------------
+Modo residente: el inventario queda cargado e indexado en memoria y cada acta que
+llega a la carpeta de entrada se aplica sobre él apenas termina de copiarse (sin
+releer ni reescribir el inventario por cada acta).
+
+El libro actualizado se guarda cuando la bandeja lleva ``flush_delay`` segundos sin
+actas nuevas, a más tardar ``max_delay`` segundos después de la primera acta sin
+guardar, al dejar en la bandeja un archivo llamado GUARDAR o al detener el modo.
+Cada guardado genera un archivo nuevo junto al inventario (como "Procesar") con
+todas las actas registradas en la bitácora del inventario: al reiniciar el modo sobre
+el mismo inventario se repiten las ya aplicadas y las que vuelvan a llegar se omiten.
+
+Las actas aplicadas pasan a done/ cuando su cambio quedó guardado; las que no se
+pudieron aplicar pasan de inmediato a error/, con un .txt que explica el motivo.
+"""
+
+import os
+import time
+
+from actualizador_inventario_cache import file_stamp
+from actualizador_inventario_core import (
+    DEFAULT_START_ROW,
+    DEFAULT_LOCATION_MODE,
+    DEFAULT_ACTA_MODE,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_FUZZY_MODE,
+    DEFAULT_FUZZY_THRESHOLD,
+    RunStats,
+    apply_acta,
+    load_journal,
+    open_inventory,
+    save_inventory,
+    validate_acta,
+)
+
+
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_FLUSH_DELAY = 30.0       # segundos sin actas nuevas antes de guardar
+DEFAULT_MAX_DELAY = 300.0        # tope de espera desde la primera acta sin guardar
+FLUSH_TRIGGER = "GUARDAR"        # archivo (con o sin extensión) que pide guardar ya
+DONE_DIR = "done"
+ERROR_DIR = "error"
+
+
+def _move(path, folder):
+    # Mueve a ``folder`` sin pisar un archivo del mismo nombre: "acta (2).xlsx"
+    base, ext = os.path.splitext(os.path.basename(path))
+    target = os.path.join(folder, base + ext)
+    n = 2
+    while os.path.exists(target):
+        target = os.path.join(folder, f"{base} ({n}){ext}")
+        n += 1
+    os.replace(path, target)
+    return target
+
+
+class InboxWatcher:
+    """Aplica las actas que llegan a ``inbox`` sobre un inventario residente en memoria.
+
+    ``poll()`` hace una pasada (aplica las actas listas y guarda si corresponde);
+    ``run()`` repite pasadas hasta Ctrl+C o hasta que ``stop()`` devuelva True, y guarda
+    lo pendiente al salir. ``flush()`` guarda a pedido.
+    """
+
+    def __init__(self, inv, inbox, log, start_row=DEFAULT_START_ROW, location_mode=DEFAULT_LOCATION_MODE,
+                 acta_mode=DEFAULT_ACTA_MODE, output_mode=DEFAULT_OUTPUT_MODE, fuzzy_mode=DEFAULT_FUZZY_MODE,
+                 fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, flush_delay=DEFAULT_FLUSH_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, use_journal=True):
+        self.session = open_inventory(inv)
+        self.inbox = inbox
+        if os.path.normcase(os.path.abspath(inbox)) == \
+                os.path.normcase(os.path.abspath(os.path.dirname(self.session.path) or ".")):
+            # Los archivos generados caerían en la bandeja como si fueran actas
+            raise ValueError("LA BANDEJA DE ENTRADA NO PUEDE SER LA CARPETA DEL INVENTARIO")
+        self.log = log
+        self.options = dict(start_row=start_row, location_mode=location_mode, acta_mode=acta_mode,
+                            fuzzy_mode=fuzzy_mode, fuzzy_threshold=fuzzy_threshold)
+        self.output_mode = output_mode
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        self.done_dir = os.path.join(inbox, DONE_DIR)
+        self.error_dir = os.path.join(inbox, ERROR_DIR)
+        os.makedirs(self.done_dir, exist_ok=True)
+        os.makedirs(self.error_dir, exist_ok=True)
+
+        self.inv_sheets = self.session.working_sheets()
+        self.inventory_stamp = file_stamp(self.session.path)
+        self.stats = RunStats()
+        self.journal = load_journal(self.session, self.inv_sheets, log, self.stats) if use_journal else None
+        self.pending = []            # actas aplicadas en memoria, aún no guardadas
+        self.outputs = []            # archivos generados
+        self.applied = []            # resumen por acta ya guardada (con su archivo de salida)
+        self.failed = []             # [{"acta", "error"}]
+        self._sizes = {}             # ruta -> (tamaño, mtime) de la pasada anterior
+        self._first_pending = None
+        self._last_change = None
+
+        # Índice armado al iniciar: la primera acta no paga la indexación
+        self.session.serial_lookup
+        self.log(f"Inventario en memoria: {self.session.path} ({len(self.session.global_index)} series)\n")
+
+    # --- Una pasada por la bandeja
+    def poll(self, now=None):
+        now = time.monotonic() if now is None else now
+        flush_requested = False
+        pending = {path for path, _ in self.pending}
+        ready = []
+        seen = {}
+        for entry in os.scandir(self.inbox):
+            if not entry.is_file():
+                continue
+            if os.path.splitext(entry.name)[0].upper() == FLUSH_TRIGGER:
+                flush_requested = True
+                os.remove(entry.path)
+                continue
+            if not entry.name.lower().endswith(".xlsx") or entry.name.startswith("~$"):
+                continue
+            if entry.path in pending:
+                continue
+            st = entry.stat()
+            seen[entry.path] = (st.st_size, st.st_mtime_ns)
+            # Lista cuando no cambió desde la pasada anterior (terminó de copiarse)
+            if self._sizes.get(entry.path) == seen[entry.path] and self._readable(entry.path):
+                ready.append(entry.path)
+        self._sizes = seen
+
+        for doc, path in self._in_order(ready):
+            self.apply(doc, path, now)
+
+        if flush_requested or self.flush_due(now):
+            self.flush()
+        return len(ready)
+
+    @staticmethod
+    def _readable(path):
+        try:
+            with open(path, "rb"):
+                return True
+        except OSError:
+            return False   # todavía abierto por quien lo está copiando
+
+    def _in_order(self, paths):
+        # Igual que en lote: por fecha de fila 8 y, a igual fecha, por nombre
+        docs = []
+        for path in paths:
+            try:
+                docs.append((validate_acta(path), path))
+            except Exception as e:
+                self._reject(path, e)
+        docs.sort(key=lambda d: (d[0].row8_date, os.path.basename(d[1])))
+        return docs
+
+    def apply(self, doc, path, now=None):
+        """Aplica un acta ya validada sobre el inventario en memoria (queda pendiente de guardar)."""
+        name = os.path.basename(path)
+        t0 = time.perf_counter()
+        try:
+            if self.journal is not None:
+                meta = doc.meta(self.options["location_mode"], self.options["acta_mode"])
+                previous = self.journal.lookup(doc.content_hash, meta.get("acta_text"), meta.get("date_str"))
+                if previous:
+                    self._skip(path, meta, previous)
+                    return
+            items = []
+            meta, resp, updated, added = apply_acta(
+                self.session, self.inv_sheets, doc, log=lambda msg: self.log(f"{name}: {msg}"), stats=self.stats,
+                journal=self.journal, matches=items, **self.options
+            )
+        except Exception as e:
+            self._reject(path, e)
+            return
+        elapsed = (time.perf_counter() - t0) * 1000
+        self.stats.add("actas_applied")
+        self.pending.append((path, {"acta": path, "acta_text": meta.get("acta_text"),
+                                    "date_str": meta.get("date_str"), "responsable": resp,
+                                    "updated": updated, "added": added, "items": items}))
+        now = time.monotonic() if now is None else now
+        if self._first_pending is None:
+            self._first_pending = now
+        self._last_change = now
+        self.log(f"{name}: {meta.get('acta_text')} — actualizados {updated}, agregados a SIN SERIAL {added} "
+                 f"({elapsed:.0f} ms)\n")
+
+    def _skip(self, path, meta, previous):
+        # Ya registrada en la bitácora: no se aplica de nuevo y no queda pendiente de guardar
+        self.stats.add("actas_skipped")
+        self.log(f"{os.path.basename(path)}: {meta.get('acta_text')} ya fue aplicada "
+                 f"({previous['acta']}, {previous['at']}); se omite.\n")
+        try:
+            _move(path, self.done_dir)
+        except OSError as e:
+            self.log(f"No se pudo mover {os.path.basename(path)} a {DONE_DIR}/: {e}\n")
+
+    def _reject(self, path, error):
+        self.stats.add("actas_rejected")
+        self.failed.append({"acta": path, "error": str(error)})
+        self.log(f"Omitida {os.path.basename(path)}: {error}\n")
+        try:
+            target = _move(path, self.error_dir)
+            with open(os.path.splitext(target)[0] + ".txt", "w", encoding="utf-8") as f:
+                f.write(f"{error}\n")
+        except OSError as e:
+            self.log(f"No se pudo mover {os.path.basename(path)} a {ERROR_DIR}/: {e}\n")
+
+    # --- Guardado diferido
+    def flush_due(self, now):
+        if not self.pending:
+            return False
+        return now - self._last_change >= self.flush_delay or now - self._first_pending >= self.max_delay
+
+    def flush(self):
+        """Guarda el inventario con todo lo aplicado y mueve a done/ las actas guardadas.
+
+        Devuelve la ruta generada, o None si no había nada pendiente o no se pudo guardar
+        (las actas siguen pendientes y se reintenta en el próximo plazo).
+        """
+        if not self.pending:
+            return None
+        if file_stamp(self.session.path) != self.inventory_stamp:
+            self.log("Aviso: el inventario cambió en disco desde que se cargó; "
+                     "se guarda sobre la versión cargada al iniciar.\n")
+        try:
+            out_path = save_inventory(self.session, self.inv_sheets, self.log, self.output_mode, stats=self.stats)
+        except Exception as e:
+            self.log(f"No se pudo guardar ({e}); se reintenta más tarde.\n")
+            self._first_pending = self._last_change = time.monotonic()
+            return None
+        if self.journal is not None:
+            self.journal.record_output(out_path)
+        for path, summary in self.pending:
+            self.applied.append(dict(summary, output=out_path))
+            try:
+                _move(path, self.done_dir)
+            except OSError as e:
+                self.log(f"No se pudo mover {os.path.basename(path)} a {DONE_DIR}/: {e}\n")
+        self.log(f"Guardado con {len(self.pending)} acta(s) nueva(s): {out_path}\n")
+        if out_path not in self.outputs:      # dos guardados en el mismo minuto: mismo archivo
+            self.outputs.append(out_path)
+        self.pending = []
+        self._first_pending = self._last_change = None
+        return out_path
+
+    def run(self, poll_seconds=DEFAULT_POLL_SECONDS, stop=None):
+        self.log(f"Vigilando {self.inbox} (Ctrl+C para terminar; archivo {FLUSH_TRIGGER} para guardar ya)\n")
+        try:
+            while not (stop and stop()):
+                self.poll()
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            self.log("Deteniendo...\n")
+        finally:
+            self.flush()
+            self.stats.end()
+        return self.outputs
@@ -9,6 +9,8 @@ if errorlevel 1 (
   pip install pyinstaller pandas openpyxl
 )
 pyinstaller --onefile --noconsole --collect-all pandas --collect-all openpyxl --name "ActualizadorInventario" actualizador_inventario_gui.py
+pyinstaller --onefile --console --collect-all pandas --collect-all openpyxl --exclude-module tkinter --name "ActualizadorInventarioCLI" actualizador_inventario_cli.py
 echo.
 echo Listo: dist\ActualizadorInventario.exe
+echo        dist\ActualizadorInventarioCLI.exe
 pause